@@ -0,0 +1,83 @@
+"""All AI services in one process: hiring, recommendation, resume parsing,
+interview scoring and clustering.
+
+Usage: gunicorn -c gunicorn.conf.py ai_server:app
+
+Each service module is imported once, so each model is loaded once per
+process (and once per node with gunicorn's preload, shared copy-on-write
+by the workers), and all services share the data_access Mongo pool. The
+Flask apps keep their own routes, CORS and metrics; requests are handed
+to the app that owns the path. app is a plain WSGI dispatcher, served by
+gunicorn's threaded workers. A service that fails to load (e.g. its model
+file is missing) is logged and left out; the others still start.
+"""
+import importlib
+import logging
+from functools import lru_cache
+from werkzeug.exceptions import MethodNotAllowed, NotFound
+from werkzeug.routing import RequestRedirect
+
+logger = logging.getLogger(__name__)
+
+# Service name -> module defining its Flask app, in routing priority order
+SERVICE_MODULES = {
+    "hiring": "hiring_model",
+    "recommendation": "recommendation_service",
+    "resume_parser": "iA4",
+    "interview_score": "interview_score_model",
+    "clustering": "clustering",
+}
+
+
+def _load_services():
+    """Import each service on its own, so one missing model or dependency
+    only takes its own routes down"""
+    services = {}
+    for name, module in SERVICE_MODULES.items():
+        try:
+            services[name] = importlib.import_module(module).app
+        except Exception:
+            logger.exception("%s service unavailable, serving without it", name)
+    if not services:
+        raise RuntimeError("No AI service could be loaded")
+    return services
+
+
+SERVICES = _load_services()
+
+# Served identically by every app
+SHARED_RULES = {"/metrics", "/static/<path:filename>"}
+
+
+def _check_routes():
+    owners = {}
+    for name, service in SERVICES.items():
+        for rule in service.url_map.iter_rules():
+            if rule.rule in SHARED_RULES:
+                continue
+            if rule.rule in owners:
+                logger.warning("%s is defined by %s and %s, %s wins", rule.rule, owners[rule.rule], name, owners[rule.rule])
+            else:
+                owners[rule.rule] = name
+
+
+@lru_cache(maxsize=4096)
+def service_for(path: str, method: str):
+    """The first app with a rule matching path (any method), else the first app"""
+    for service in SERVICES.values():
+        try:
+            service.url_map.bind("localhost").match(path, method)
+        except (MethodNotAllowed, RequestRedirect):
+            return service  # the app owns the path and answers 405 or redirects
+        except NotFound:
+            continue
+        return service
+    return next(iter(SERVICES.values()))
+
+
+def app(environ, start_response):
+    service = service_for(environ.get("PATH_INFO") or "/", environ["REQUEST_METHOD"])
+    return service(environ, start_response)
+
+
+_check_routes()
@@ -0,0 +1,82 @@
+"""Per-cluster statistics on synthetic candidates: grouped pass vs per-cluster masks.
+
+Usage: python benchmark_cluster_stats.py --rows 1000 100000 1000000 --clusters 8 32
+"""
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from clustering import SALARY_PERCENTILES, calculate_cluster_stats
+
+
+def masked_cluster_stats(df):
+    """The previous implementation: one boolean mask and separate mode sorts per cluster"""
+    cluster_stats = []
+    for cluster_num in sorted(df['cluster'].unique()):
+        cluster_data = df[df['cluster'] == cluster_num]
+        cluster_stats.append({
+            'cluster': int(cluster_num),
+            'count': int(len(cluster_data)),
+            'avg_salary': float(cluster_data['desired_salary'].mean()),
+            'most_common_location': cluster_data['location'].mode()[0],
+            'most_common_domain': cluster_data['domain'].mode()[0],
+            'avg_experience': float(cluster_data['experience_years'].mean())
+        })
+    return cluster_stats
+
+
+def synthetic_candidates(rows, clusters, rng):
+    """Candidates shaped like prepare_candidate_data output, with a predicted cluster"""
+    domains = np.array([f'domain_{i}' for i in range(25)], dtype=object)
+    locations = np.array([f'city_{i}' for i in range(60)], dtype=object)
+    educations = np.array(['bac', 'licence', 'master', 'ingenieur', 'doctorat', 'unknown'], dtype=object)
+    return pd.DataFrame({
+        'user_id': np.arange(rows).astype(str),
+        'domain': domains[rng.zipf(1.5, rows) % len(domains)],
+        'experience_years': rng.integers(0, 15, rows),
+        'education': educations[rng.integers(0, len(educations), rows)],
+        'desired_salary': rng.lognormal(7.5, 0.5, rows).astype(int),
+        'location': locations[rng.zipf(1.3, rows) % len(locations)],
+        'cluster': rng.integers(0, clusters, rows)
+    })
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 100000, 1000000])
+    parser.add_argument('--clusters', type=int, nargs='+', default=[8, 32])
+    parser.add_argument('--skip-masked', action='store_true', help='only time the grouped pass')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    print(f"{'rows':>9} {'clusters':>8} {'grouped (s)':>12} {'+ pctl (s)':>11} {'masked (s)':>11} {'speedup':>8}")
+    for rows in args.rows:
+        for clusters in args.clusters:
+            df = synthetic_candidates(rows, clusters, rng)
+            grouped, grouped_time = timed(calculate_cluster_stats, df)
+            detailed, percentile_time = timed(calculate_cluster_stats, df, SALARY_PERCENTILES)
+            first = df.loc[df['cluster'] == detailed[0]['cluster'], 'desired_salary']
+            expected = np.percentile(first, SALARY_PERCENTILES)
+            assert np.allclose(list(detailed[0]['salary_percentiles'].values()), expected)
+
+            masked_time = speedup = '-'
+            if not args.skip_masked:
+                masked, masked_time = timed(masked_cluster_stats, df)
+                for new, old in zip(grouped, masked):
+                    assert new['count'] == old['count'] and new['most_common_domain'] == old['most_common_domain']
+                    assert new['most_common_location'] == old['most_common_location']
+                    assert np.isclose(new['avg_salary'], old['avg_salary'])
+                speedup = f"{masked_time / grouped_time:.1f}x"
+                masked_time = f"{masked_time:.3f}"
+            print(f"{rows:>9} {clusters:>8} {grouped_time:>12.3f} {percentile_time:>11.3f} {masked_time:>11} {speedup:>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""Recall vs latency of the job index families on synthetic job embeddings.
+
+Recall is measured on a fresh index and again after an incremental refresh
+that re-adds --churn of the jobs under new ids, as update_job_index does for
+edited jobs (removing the old vectors, or masking them in HNSW).
+
+Usage: python benchmark_index.py --jobs 200000 --queries 500 --types flat ivf_flat ivf_pq hnsw
+"""
+import argparse
+import time
+import numpy as np
+import faiss
+from index_factory import INDEX_TYPES, IndexConfig, build_index, search_parameters
+
+
+def synthetic_embeddings(n, dimension, clusters, rng):
+    """Normalised vectors grouped around random centres, like job postings by domain"""
+    centres = rng.standard_normal((clusters, dimension)).astype('float32')
+    vectors = centres[rng.integers(0, clusters, n)] + 0.5 * rng.standard_normal((n, dimension)).astype('float32')
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def search(index, queries, k, params=None):
+    # The service searches one candidate at a time, so time single-vector queries
+    latencies = []
+    results = np.empty((len(queries), k), dtype='int64')
+    for i, query in enumerate(queries):
+        start = time.perf_counter()
+        _, ids = index.search(query.reshape(1, -1), k, params=params)
+        latencies.append(time.perf_counter() - start)
+        results[i] = ids[0]
+    return np.array(latencies) * 1000, results
+
+
+def run(index_type, jobs, queries, k, args, rng=None):
+    config = IndexConfig(
+        index_type=index_type,
+        nlist=args.nlist,
+        nprobe=args.nprobe,
+        pq_m=args.pq_m,
+        hnsw_m=args.hnsw_m,
+        ef_search=args.ef_search
+    )
+
+    start = time.perf_counter()
+    index = build_index(config, jobs)
+    index.add_with_ids(jobs, np.arange(len(jobs), dtype='int64'))
+    build_time = time.perf_counter() - start
+    latencies, results = search(index, queries, k)
+    if rng is None:
+        return build_time, latencies, results, None
+
+    # Re-add the churned jobs under ids offset by len(jobs), then map the
+    # hits back so recall compares against the same ground truth
+    churned = rng.choice(len(jobs), int(len(jobs) * args.churn), replace=False).astype('int64')
+    params = None
+    if config.supports_removal:
+        index.remove_ids(churned)
+    else:
+        masked = faiss.IDSelectorBatch(churned)
+        params = search_parameters(index, config, faiss.IDSelectorNot(masked))
+    index.add_with_ids(jobs[churned], churned + len(jobs))
+    _, refreshed = search(index, queries, k, params)
+    refreshed = np.where(refreshed >= len(jobs), refreshed - len(jobs), refreshed)
+    return build_time, latencies, results, refreshed
+
+
+def recall(results, truth, k):
+    return np.mean([len(np.intersect1d(found, expected)) / k for found, expected in zip(results, truth)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--jobs', type=int, default=200000)
+    parser.add_argument('--queries', type=int, default=500)
+    parser.add_argument('--dimension', type=int, default=384)  # all-MiniLM-L6-v2
+    parser.add_argument('--clusters', type=int, default=200)
+    parser.add_argument('-k', type=int, default=5)  # recommend_jobs' default top_k
+    parser.add_argument('--churn', type=float, default=0.01)  # fraction of jobs edited per refresh
+    parser.add_argument('--types', nargs='+', choices=INDEX_TYPES, default=list(INDEX_TYPES))
+    parser.add_argument('--nlist', type=int, default=IndexConfig.nlist)
+    parser.add_argument('--nprobe', type=int, default=IndexConfig.nprobe)
+    parser.add_argument('--pq-m', type=int, default=IndexConfig.pq_m)
+    parser.add_argument('--hnsw-m', type=int, default=IndexConfig.hnsw_m)
+    parser.add_argument('--ef-search', type=int, default=IndexConfig.ef_search)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    jobs = synthetic_embeddings(args.jobs, args.dimension, args.clusters, rng)
+    queries = synthetic_embeddings(args.queries, args.dimension, args.clusters, rng)
+
+    # Exact search gives the ground truth every other family is scored against
+    _, _, truth, _ = run("flat", jobs, queries, args.k, args)
+
+    print(f"{args.jobs} jobs, {args.queries} queries, k={args.k}, churn={args.churn}")
+    print(f"{'index':<10} {'build s':>9} {'p50 ms':>8} {'p99 ms':>8} {'recall':>8} {'refreshed':>10}")
+    for index_type in args.types:
+        build_time, latencies, results, refreshed = run(index_type, jobs, queries, args.k, args, rng)
+        print(f"{index_type:<10} {build_time:>9.2f} {np.percentile(latencies, 50):>8.3f} "
+              f"{np.percentile(latencies, 99):>8.3f} {recall(results, truth, args.k):>8.3f} "
+              f"{recall(refreshed, truth, args.k):>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""Import-to-ready time and memory of the resume parser, per worker.
+
+Usage: python benchmark_startup.py --workers 4
+
+Each scenario runs in a fresh interpreter:
+  lazy     import iA4, spaCy not loaded (the default)
+  eager    import iA4 and load spaCy in the worker
+  preload  load spaCy once, then fork workers that share it copy-on-write
+RSS counts shared pages in every worker; PSS splits them between the
+workers sharing them and is the fairer per-worker figure (Linux only).
+"""
+import argparse
+import gc
+import json
+import os
+import subprocess
+import sys
+import time
+
+SCENARIOS = ('lazy', 'eager', 'preload')
+
+
+def memory():
+    """RSS, PSS and private memory of this process in MiB"""
+    usage = {}
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            for line in f:
+                key, value = line.split(':', 1)
+                if key in ('Rss', 'Pss', 'Private_Clean', 'Private_Dirty'):
+                    usage[key] = int(value.split()[0]) / 1024
+    except OSError:
+        import resource
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        usage['Rss'] = maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+    private = usage.get('Private_Clean', 0) + usage.get('Private_Dirty', 0)
+    return {
+        'rss_mb': round(usage['Rss'], 1),
+        'pss_mb': round(usage['Pss'], 1) if 'Pss' in usage else None,
+        'private_mb': round(private, 1) if 'Pss' in usage else None
+    }
+
+
+def serve_one(iA4):
+    """What a worker does on its first request that needs spaCy"""
+    iA4.get_nlp()("Jane Doe, software engineer at Example Corp in Paris.")
+
+
+def run_scenario(scenario, workers):
+    """Runs inside the child interpreter and prints one JSON line per worker"""
+    started = time.perf_counter()
+    import iA4
+    if scenario == 'lazy':
+        print(json.dumps({'worker': 0, 'ready_s': round(time.perf_counter() - started, 3), **memory()}))
+        return
+
+    iA4.get_nlp()
+    ready = time.perf_counter() - started
+    if scenario == 'eager':
+        serve_one(iA4)
+        print(json.dumps({'worker': 0, 'ready_s': round(ready, 3), **memory()}))
+        return
+
+    # preload: mirror gunicorn --preload with gc.freeze() in when_ready
+    gc.freeze()
+    sys.stdout.flush()
+    children = []
+    for worker in range(workers):
+        fork_started = time.perf_counter()
+        pid = os.fork()
+        if pid == 0:
+            serve_one(iA4)
+            # Readiness of a forked worker is the fork itself, the model is already loaded
+            print(json.dumps({
+                'worker': worker,
+                'ready_s': round(time.perf_counter() - fork_started, 3),
+                'master_load_s': round(ready, 3),
+                **memory()
+            }), flush=True)
+            time.sleep(1)  # stay alive so siblings see the pages as shared
+            os._exit(0)
+        children.append(pid)
+    for pid in children:
+        os.waitpid(pid, 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=4, help='forked workers in the preload scenario')
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument('--run', choices=SCENARIOS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run_scenario(args.run, args.workers)
+        return
+
+    env = {**os.environ, 'SPACY_PRELOAD': '0'}
+    print(f"{'scenario':<10} {'worker':>6} {'ready (s)':>10} {'RSS (MiB)':>10} {'PSS (MiB)':>10} {'private':>10}")
+    for scenario in args.scenarios:
+        output = subprocess.run(
+            [sys.executable, __file__, '--run', scenario, '--workers', str(args.workers)],
+            env=env, check=True, capture_output=True, text=True
+        ).stdout
+        row = {}
+        for line in output.splitlines():
+            if not line.startswith('{'):
+                continue  # messages printed by iA4 at import
+            row = json.loads(line)
+            print(f"{scenario:<10} {row['worker']:>6} {row['ready_s']:>10.3f} {row['rss_mb']:>10} "
+                  f"{row['pss_mb'] or '-':>10} {row['private_mb'] or '-':>10}")
+        if scenario == 'preload' and 'master_load_s' in row:
+            print(f"{'':<10} master loaded spaCy once in {row['master_load_s']:.3f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,34 +1,113 @@
 # clustering_api.py
 
 import os
+import json
+import time
 import pickle
-from flask import Flask, jsonify
+import hashlib
+import socket
+import threading
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from flask import Flask, jsonify, request
 from flask_cors import CORS
-from pymongo import MongoClient
+from pymongo import ASCENDING, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+import numpy as np
 import pandas as pd
 from dotenv import load_dotenv
+import data_access
+from metrics import init_metrics, time_inference, time_mongo
 
 # Charger les variables d'environnement
 load_dotenv()
 
 app = Flask(__name__)
 CORS(app)
+init_metrics(app, "clustering")
 
-# Connexion MongoDB
-def get_mongo_collection():
+MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "clustering_model.pkl")
+
+# Champs lus par prepare_candidate_data : seule la première candidature est utilisée
+CANDIDATE_PROJECTION = {
+    "applications": {"$slice": 1},
+    "profile.experience": 1,
+    "profile.education": 1,
+    "enterprise.location": 1
+}
+
+# Documents récupérés par aller-retour MongoDB
+CURSOR_BATCH_SIZE = 1000
+
+# Colonnes attendues par le modèle, dans l'ordre
+FEATURE_COLUMNS = ['domain', 'experience_years', 'education', 'desired_salary', 'location']
+
+# Vue matérialisée : une affectation par candidat, et les compteurs par cluster
+ASSIGNMENTS_COLLECTION = "candidate_clusters"
+STATS_COLLECTION = "cluster_stats"
+STATS_CATEGORIES = ('domain', 'location', 'education')  # colonnes dont on garde la valeur la plus fréquente
+
+# Âge maximal de la vue avant resynchronisation en arrière-plan (secondes)
+CLUSTER_SYNC_SECONDS = int(os.getenv("CLUSTER_SYNC_SECONDS", 60))
+
+# Bail de synchronisation partagé dans MongoDB : un seul processus (worker
+# gunicorn ou autre nœud) synchronise la vue à la fois. Il est prolongé à
+# chaque lot, et repris par un autre processus s'il n'est plus prolongé.
+SYNC_COLLECTION = "cluster_sync"
+SYNC_LEASE_ID = "assignments"
+SYNC_LEASE_SECONDS = int(os.getenv("CLUSTER_SYNC_LEASE_SECONDS", 300))
+
+# Percentiles de salaire détaillés par /cluster/stats
+SALARY_PERCENTILES = (25, 50, 75, 90)
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+FILTER_FIELDS = ('domain', 'location', 'education')
+
+_indexes_ready = False
+_model = None
+_model_mtime = None
+_lock = threading.Lock()
+_sync_lock = threading.Lock()
+_sync_thread = None
+_detailed_stats = None  # (calculé à, statistiques) pour /cluster/stats
+
+# Connexion MongoDB : client partagé de data_access, index créés une fois
+def get_db():
+    global _indexes_ready
     try:
-        client = MongoClient(os.getenv("MONGO_URI"))
-        db = client[os.getenv("MONGO_DB_NAME", "users")]
-        return db["users"]
+        db = data_access.get_db()
+        if not _indexes_ready:
+            with _lock:
+                if not _indexes_ready:
+                    db[ASSIGNMENTS_COLLECTION].create_index("cluster")
+                    for field in FILTER_FIELDS:
+                        db[ASSIGNMENTS_COLLECTION].create_index(field)
+                    create_stats_index(db[STATS_COLLECTION])
+                    _indexes_ready = True
+        return db
     except Exception as e:
         print(f"❌ Erreur de connexion MongoDB : {e}")
         raise
 
-# Charger le modèle pipeline
+# Le parcours complet des candidats est une lecture analytique (secondaire si possible)
+def get_mongo_collection():
+    return data_access.get_db(analytics=True)["users"]
+
+# Charger le modèle pipeline, rechargé seulement si le fichier a changé
 def load_model():
+    global _model, _model_mtime
     try:
-        with open("clustering_model.pkl", "rb") as f:
-            return pickle.load(f)
+        mtime = os.stat(MODEL_PATH).st_mtime_ns
+        if _model is None or mtime != _model_mtime:
+            with _lock:
+                if _model is None or mtime != _model_mtime:
+                    with open(MODEL_PATH, "rb") as f:
+                        _model = pickle.load(f)
+                    _model_mtime = mtime
+                    print(f"✅ Modèle de clustering chargé ({MODEL_PATH})")
+        return _model
     except Exception as e:
         print(f"❌ Erreur chargement modèle : {e}")
         raise
@@ -58,44 +137,402 @@ def prepare_candidate_data(users):
     
     return pd.DataFrame(data) if data else pd.DataFrame()
 
-# Statistiques des clusters
-def calculate_cluster_stats(df):
+# Valeur la plus fréquente par cluster ; en cas d'égalité la plus petite,
+# comme Series.mode()[0]. Un seul bincount sur les codes catégoriels.
+def most_common_values(cluster_codes, n_clusters, values):
+    try:
+        values = values.astype('category')
+    except TypeError:  # valeurs non hachables (listes, dictionnaires)
+        values = values.astype(str).astype('category')
+    categories = values.cat.categories
+    codes = values.cat.codes.to_numpy()
+    known = codes >= 0
+    counts = np.bincount(
+        cluster_codes[known] * len(categories) + codes[known],
+        minlength=n_clusters * len(categories)
+    ).reshape(n_clusters, len(categories))
+    best = counts.argmax(axis=1) if len(categories) else np.zeros(n_clusters, dtype=int)
+    return [categories[i] if len(categories) and counts[row, i] else None for row, i in enumerate(best)]
+
+# Statistiques des clusters : une seule passe groupée, quel que soit le
+# nombre de clusters. Les sommes et effectifs sont des bincount sur le code
+# du cluster, les modes des bincount sur les codes catégoriels, et les
+# percentiles de salaire sont lus dans un unique tri (cluster, salaire).
+def calculate_cluster_stats(df, percentiles=()):
+    if df.empty:
+        return []
+
+    cluster_codes, clusters = pd.factorize(df['cluster'], sort=True)
+    n_clusters = len(clusters)
+    salary = df['desired_salary'].to_numpy(dtype=float)
+    experience = df['experience_years'].to_numpy(dtype=float)
+
+    counts = np.bincount(cluster_codes, minlength=n_clusters)
+    avg_salary = np.bincount(cluster_codes, weights=salary, minlength=n_clusters) / counts
+    avg_experience = np.bincount(cluster_codes, weights=experience, minlength=n_clusters) / counts
+    modes = {
+        column: most_common_values(cluster_codes, n_clusters, df[column])
+        for column in ('location', 'domain', 'education')
+    }
+
+    salary_percentiles = {}
+    if percentiles:
+        # Interpolation linéaire, comme np.percentile, dans chaque groupe trié
+        sorted_salary = salary[np.lexsort((salary, cluster_codes))]
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        for p in percentiles:
+            position = starts + (counts - 1) * p / 100
+            lower = np.floor(position).astype(int)
+            upper = np.minimum(lower + 1, starts + counts - 1)
+            fraction = position - lower
+            salary_percentiles[f'p{p}'] = sorted_salary[lower] * (1 - fraction) + sorted_salary[upper] * fraction
+
     cluster_stats = []
-    for cluster_num in sorted(df['cluster'].unique()):
-        cluster_data = df[df['cluster'] == cluster_num]
+    for i, cluster_num in enumerate(clusters):
         stats = {
             'cluster': int(cluster_num),
-            'count': int(len(cluster_data)),
-            'avg_salary': float(cluster_data['desired_salary'].mean()),
-            'most_common_location': cluster_data['location'].mode()[0],
-            'most_common_domain': cluster_data['domain'].mode()[0],
-            'avg_experience': float(cluster_data['experience_years'].mean())
+            'count': int(counts[i]),
+            'avg_salary': float(avg_salary[i]),
+            'most_common_location': modes['location'][i],
+            'most_common_domain': modes['domain'][i],
+            'most_common_education': modes['education'][i],
+            'avg_experience': float(avg_experience[i])
         }
+        if salary_percentiles:
+            stats['salary_percentiles'] = {name: float(values[i]) for name, values in salary_percentiles.items()}
         cluster_stats.append(stats)
     return cluster_stats
 
-# Endpoint clustering
-@app.route('/cluster', methods=['GET'])
-def cluster_candidates():
+# Empreinte des features et de la version du modèle : une affectation n'est
+# recalculée que si elle change
+def assignment_key(record, model_version):
+    features = json.dumps([record[column] for column in FEATURE_COLUMNS], default=str)
+    return hashlib.sha1(f"{model_version}|{features}".encode('utf-8')).hexdigest()
+
+# Contribution (signe +1 ou -1) d'affectations aux compteurs de cluster_stats
+def add_stats_deltas(deltas, assignments, sign):
+    for assignment in assignments:
+        cluster = int(assignment['cluster'])
+        totals = deltas[(cluster, '_total', None)]
+        totals['count'] += sign
+        totals['salary_sum'] += sign * int(assignment['desired_salary'])
+        totals['experience_sum'] += sign * int(assignment['experience_years'])
+        for field in STATS_CATEGORIES:
+            if assignment.get(field) is not None:  # ignorées aussi par calculate_cluster_stats
+                deltas[(cluster, field, str(assignment[field]))]['count'] += sign
+
+def create_stats_index(collection):
+    collection.create_index(
+        [("cluster", ASCENDING), ("field", ASCENDING), ("value", ASCENDING)], unique=True
+    )
+
+def write_stats_deltas(db, deltas, collection=STATS_COLLECTION):
+    operations = [
+        UpdateOne(
+            {'cluster': cluster, 'field': field, 'value': value},
+            {'$inc': {name: amount for name, amount in counters.items() if amount}},
+            upsert=True
+        )
+        for (cluster, field, value), counters in deltas.items() if any(counters.values())
+    ]
+    if operations:
+        with time_mongo(collection, "bulk_write"):
+            db[collection].bulk_write(operations, ordered=False)
+
+# Recalcul complet des compteurs depuis la vue, si une synchronisation
+# concurrente a pu fausser les deltas
+def rebuild_cluster_stats(db):
+    # Construites dans une collection temporaire puis renommées d'un coup :
+    # les lecteurs voient toujours un jeu de statistiques complet
+    print("🔁 Reconstruction des statistiques de clusters")
+    staging = f"{STATS_COLLECTION}_rebuild"
+    db[staging].drop()
+    create_stats_index(db[staging])
+    cursor = db[ASSIGNMENTS_COLLECTION].find({}, {'_id': 0, 'cluster': 1, **{c: 1 for c in FEATURE_COLUMNS}})
+    for batch in batched(cursor, CURSOR_BATCH_SIZE):
+        deltas = defaultdict(Counter)
+        add_stats_deltas(deltas, batch, 1)
+        write_stats_deltas(db, deltas, staging)
+    db[staging].rename(STATS_COLLECTION, dropTarget=True)
+
+def read_cluster_stats(db):
+    """Statistiques par cluster, au format de calculate_cluster_stats (sans percentiles)"""
+    totals = {}
+    most_common = defaultdict(dict)
+    with time_mongo(STATS_COLLECTION, "find"):
+        documents = list(db[STATS_COLLECTION].find({'count': {'$gt': 0}}, {'_id': 0}))
+    for doc in documents:
+        cluster = doc['cluster']
+        if doc['field'] == '_total':
+            totals[cluster] = doc
+        else:
+            # Égalité : la plus petite valeur, comme calculate_cluster_stats
+            best = most_common[cluster].get(doc['field'])
+            if best is None or (-doc['count'], doc['value']) < best:
+                most_common[cluster][doc['field']] = (-doc['count'], doc['value'])
+
+    stats = []
+    for cluster in sorted(totals):
+        doc = totals[cluster]
+        count = doc['count']
+        stats.append({
+            'cluster': cluster,
+            'count': count,
+            'avg_salary': doc.get('salary_sum', 0) / count,
+            'most_common_location': most_common[cluster].get('location', (0, None))[1],
+            'most_common_domain': most_common[cluster].get('domain', (0, None))[1],
+            'most_common_education': most_common[cluster].get('education', (0, None))[1],
+            'avg_experience': doc.get('experience_sum', 0) / count
+        })
+    return stats
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+# Écrit les affectations modifiées. Chaque écriture est conditionnée à la clé
+# lue au début de la synchronisation : si un autre processus l'a modifiée
+# entre-temps, l'écriture échoue et la fonction renvoie False.
+def write_assignments(db, model, records, known):
+    frame = pd.DataFrame(records)
+    with time_inference("clustering_model"):
+        clusters = model.predict(frame[FEATURE_COLUMNS])
+
+    collection = db[ASSIGNMENTS_COLLECTION]
+    previous_ids = [record['user_id'] for record in records if record['user_id'] in known]
+    with time_mongo(ASSIGNMENTS_COLLECTION, "find"):
+        previous = list(collection.find({'_id': {'$in': previous_ids}})) if previous_ids else []
+
+    now = datetime.now(timezone.utc)
+    operations = []
+    assignments = []
+    for record, cluster in zip(records, clusters):
+        assignment = {column: record[column] for column in FEATURE_COLUMNS}
+        assignment.update(cluster=int(cluster), key=record['key'], updated_at=now)
+        assignments.append(assignment)
+        old_key = known.get(record['user_id'])
+        condition = {'key': old_key} if old_key else {'key': {'$exists': False}}
+        operations.append(UpdateOne({'_id': record['user_id'], **condition}, {'$set': assignment}, upsert=True))
+
+    try:
+        with time_mongo(ASSIGNMENTS_COLLECTION, "bulk_write"):
+            collection.bulk_write(operations, ordered=False)
+    except BulkWriteError:
+        return False
+
+    deltas = defaultdict(Counter)
+    add_stats_deltas(deltas, previous, -1)
+    add_stats_deltas(deltas, assignments, 1)
+    write_stats_deltas(db, deltas)
+    return True
+
+def remove_assignments(db, known, user_ids):
+    collection = db[ASSIGNMENTS_COLLECTION]
+    with time_mongo(ASSIGNMENTS_COLLECTION, "find"):
+        previous = list(collection.find({'_id': {'$in': user_ids}}))
+    with time_mongo(ASSIGNMENTS_COLLECTION, "delete_many"):
+        deleted = collection.delete_many(
+            {'$or': [{'_id': user_id, 'key': known[user_id]} for user_id in user_ids]}
+        ).deleted_count
+
+    deltas = defaultdict(Counter)
+    add_stats_deltas(deltas, previous, -1)
+    write_stats_deltas(db, deltas)
+    return deleted == len(previous) == len(user_ids)
+
+def lease_owner():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+# Prend ou prolonge le bail ; False s'il est détenu par un autre processus
+def acquire_sync_lease(db):
+    now = datetime.now(timezone.utc)
     try:
-        collection = get_mongo_collection()
-        model = load_model()
+        db[SYNC_COLLECTION].update_one(
+            {'_id': SYNC_LEASE_ID, '$or': [{'owner': lease_owner()}, {'expires_at': {'$lt': now}}]},
+            {'$set': {'owner': lease_owner(), 'expires_at': now + timedelta(seconds=SYNC_LEASE_SECONDS)}},
+            upsert=True  # bail détenu ailleurs : l'insertion échoue sur _id
+        )
+        return True
+    except DuplicateKeyError:
+        return False
+
+def release_sync_lease(db, synced):
+    now = datetime.now(timezone.utc)
+    update = {'expires_at': now, **({'synced_at': now} if synced else {})}
+    db[SYNC_COLLECTION].update_one({'_id': SYNC_LEASE_ID, 'owner': lease_owner()}, {'$set': update})
 
-        users = list(collection.find({"role": "CANDIDATE"}))
-        if not users:
-            return jsonify({"error": "No candidate users found", "candidates": [], "clusters": []}), 404
+# Vue synchronisée au moins une fois (et il y a moins de max_age secondes)
+def view_synced(db, max_age=None):
+    query = {'_id': SYNC_LEASE_ID, 'synced_at': {'$exists': True}}
+    if max_age is not None:
+        query['synced_at'] = {'$gt': datetime.now(timezone.utc) - timedelta(seconds=max_age)}
+    return db[SYNC_COLLECTION].find_one(query, {'_id': 1}) is not None
 
+# Synchronisation incrémentale : seuls les candidats nouveaux, modifiés ou
+# supprimés depuis la dernière synchronisation sont re-prédits / retirés.
+# À appeler en détenant le bail, prolongé à chaque lot.
+def sync_cluster_assignments():
+    db = get_db()
+    model = load_model()
+    model_version = _model_mtime
+    started = time.perf_counter()
+
+    with time_mongo(ASSIGNMENTS_COLLECTION, "find"):
+        known = {doc['_id']: doc['key'] for doc in db[ASSIGNMENTS_COLLECTION].find({}, {'key': 1})}
+
+    seen = set()
+    updated = 0
+    consistent = True
+    # Les candidats sont lus au fil du curseur, lot par lot
+    cursor = get_mongo_collection().find(
+        {"role": "CANDIDATE"}, CANDIDATE_PROJECTION, batch_size=CURSOR_BATCH_SIZE
+    )
+    for users in batched(cursor, CURSOR_BATCH_SIZE):
+        if not acquire_sync_lease(db):
+            raise RuntimeError("bail de synchronisation repris par un autre processus")
         df = prepare_candidate_data(users)
         if df.empty:
-            return jsonify({"error": "No usable data for clustering", "candidates": [], "clusters": []}), 400
+            continue
+        changed = []
+        for record in df.to_dict(orient='records'):
+            record['key'] = assignment_key(record, model_version)
+            seen.add(record['user_id'])
+            if known.get(record['user_id']) != record['key']:
+                changed.append(record)
+        if changed:
+            consistent = write_assignments(db, model, changed, known) and consistent
+            updated += len(changed)
+
+    removed = [user_id for user_id in known if user_id not in seen]
+    for user_ids in batched(removed, CURSOR_BATCH_SIZE):
+        consistent = remove_assignments(db, known, user_ids) and consistent
+
+    if not consistent:
+        rebuild_cluster_stats(db)
+
+    summary = {
+        'candidates': len(seen),
+        'updated': updated,
+        'removed': len(removed),
+        'seconds': round(time.perf_counter() - started, 3)
+    }
+    print(f"✅ Clusters synchronisés : {summary}")
+    return summary
+
+# Une seule synchronisation à la fois, tous processus confondus. Renvoie
+# None si une synchronisation est déjà en cours (ici ou ailleurs), ou si la
+# vue a moins de max_age secondes ; sans attente, les erreurs sont affichées
+def refresh_assignments(wait=True, max_age=None):
+    if not _sync_lock.acquire(blocking=wait):
+        return None
+    try:
+        db = get_db()
+        if max_age is not None and view_synced(db, max_age):
+            return None
+        if not acquire_sync_lease(db):
+            return None
+        synced = False
+        try:
+            summary = sync_cluster_assignments()
+            synced = True
+        finally:
+            release_sync_lease(db, synced)
+        if summary['updated'] or summary['removed']:
+            invalidate_detailed_stats()
+        return summary
+    except Exception as e:
+        print(f"❌ Échec de la synchronisation des clusters : {e}")
+        if wait:
+            raise
+    finally:
+        _sync_lock.release()
+
+def _sync_loop():
+    while True:
+        refresh_assignments(wait=False, max_age=CLUSTER_SYNC_SECONDS)
+        time.sleep(CLUSTER_SYNC_SECONDS)
+
+# Synchronise la vue en arrière-plan : au démarrage, puis dès qu'elle a plus
+# de CLUSTER_SYNC_SECONDS. Lancé par worker (post_fork de gunicorn), jamais
+# dans une requête ; le bail limite la synchronisation à un seul processus.
+def start_background_sync():
+    global _sync_thread
+    with _lock:
+        if _sync_thread is not None and _sync_thread.is_alive():
+            return  # un thread lancé avant un fork ne tourne pas dans l'enfant
+        _sync_thread = threading.Thread(target=_sync_loop, name="cluster-sync", daemon=True)
+        _sync_thread.start()
+
+def invalidate_detailed_stats():
+    global _detailed_stats
+    _detailed_stats = None
 
-        # Prévision avec le modèle pipeline
-        df['cluster'] = model.predict(df[['domain', 'experience_years', 'education', 'desired_salary', 'location']])
+# Statistiques complètes (percentiles compris) calculées sur toute la vue,
+# gardées CLUSTER_SYNC_SECONDS ou jusqu'à la prochaine synchronisation
+def detailed_cluster_stats(db):
+    global _detailed_stats
+    cached = _detailed_stats
+    if cached and time.monotonic() - cached[0] < CLUSTER_SYNC_SECONDS:
+        return cached[1]
+
+    with time_mongo(ASSIGNMENTS_COLLECTION, "find"):
+        rows = list(db[ASSIGNMENTS_COLLECTION].find(
+            {}, {'_id': 0, 'cluster': 1, **{c: 1 for c in FEATURE_COLUMNS}}, batch_size=CURSOR_BATCH_SIZE
+        ))
+    stats = calculate_cluster_stats(pd.DataFrame(rows), SALARY_PERCENTILES) if rows else []
+    _detailed_stats = (time.monotonic(), stats)
+    return stats
+
+def parse_cluster_query(args):
+    """Filtre MongoDB et pagination depuis la query string"""
+    page = int(args.get('page', 1))
+    page_size = int(args.get('page_size', DEFAULT_PAGE_SIZE))
+    if page < 1 or not 1 <= page_size <= MAX_PAGE_SIZE:
+        raise ValueError(f"page must be >= 1 and page_size between 1 and {MAX_PAGE_SIZE}")
+
+    query = {field: args[field] for field in FILTER_FIELDS if args.get(field)}
+    if args.get('cluster') not in (None, ''):
+        query['cluster'] = int(args['cluster'])
+    return query, page, page_size
+
+# Endpoint clustering : sert la vue matérialisée, paginée et filtrée
+# (?page=&page_size=&cluster=&domain=&location=&education=)
+@app.route('/cluster', methods=['GET'])
+def cluster_candidates():
+    try:
+        query, page, page_size = parse_cluster_query(request.args)
+    except ValueError as e:
+        return jsonify({"error": f"Invalid query: {e}", "candidates": [], "clusters": []}), 400
+
+    try:
+        db = get_db()
+        collection = db[ASSIGNMENTS_COLLECTION]
+        start_background_sync()  # sans effet s'il tourne déjà
+        if collection.estimated_document_count() == 0 and not view_synced(db):
+            # Première synchronisation en cours en arrière-plan, hors requête
+            response = jsonify({"error": "Cluster view is being built, retry shortly",
+                                "candidates": [], "clusters": []})
+            response.headers['Retry-After'] = str(CLUSTER_SYNC_SECONDS)
+            return response, 503
+
+        clusters = read_cluster_stats(db)
+        if not clusters:
+            return jsonify({"error": "No usable data for clustering", "candidates": [], "clusters": []}), 404
+
+        with time_mongo(ASSIGNMENTS_COLLECTION, "find"):
+            total = collection.count_documents(query)
+            cursor = collection.find(query, {'key': 0, 'updated_at': 0}) \
+                .sort('_id', ASCENDING).skip((page - 1) * page_size).limit(page_size)
+            candidates = [{'user_id': doc.pop('_id'), **doc} for doc in cursor]
 
         response = {
-            "candidates": df.to_dict(orient='records'),
-            "clusters": calculate_cluster_stats(df),
-            "message": f"✅ {len(df)} candidats classés en {len(df['cluster'].unique())} groupes"
+            "candidates": candidates,
+            "clusters": clusters,
+            "total": total,
+            "page": page,
+            "page_size": page_size,
+            "message": f"✅ {sum(c['count'] for c in clusters)} candidats classés en {len(clusters)} groupes"
         }
 
         return jsonify(response)
@@ -105,7 +542,31 @@ def cluster_candidates():
         traceback.print_exc()
         return jsonify({"error": f"Clustering failed: {str(e)}", "candidates": [], "clusters": []}), 500
 
+# Statistiques détaillées par cluster, avec percentiles de salaire
+@app.route('/cluster/stats', methods=['GET'])
+def cluster_stats():
+    try:
+        db = get_db()
+        start_background_sync()
+        return jsonify({"clusters": detailed_cluster_stats(db)})
+    except Exception as e:
+        return jsonify({"error": f"Cluster stats failed: {str(e)}", "clusters": []}), 500
+
+# Force une synchronisation ; ?rebuild=1 recalcule aussi les statistiques
+@app.route('/cluster/sync', methods=['POST'])
+def sync_clusters():
+    try:
+        summary = refresh_assignments(wait=True)
+        if summary is None:
+            return jsonify({"error": "A sync is already running"}), 409
+        if request.args.get('rebuild') == '1':
+            rebuild_cluster_stats(get_db())
+        return jsonify(summary)
+    except Exception as e:
+        return jsonify({"error": f"Sync failed: {str(e)}"}), 500
+
 # Lancer le serveur
 if __name__ == '__main__':
+    start_background_sync()  # sous gunicorn, post_fork le lance dans chaque worker
     port = int(os.getenv("PORT", 3001))
     app.run(host='0.0.0.0', port=port, debug=True)
@@ -0,0 +1,94 @@
+import os
+import logging
+import threading
+from pymongo import MongoClient, ReadPreference
+from pymongo.database import Database
+
+logger = logging.getLogger(__name__)
+
+# Shared MongoDB access for the AI services. Every service gets its
+# collections from get_db(); one pooled client is kept per process and
+# recreated after a fork (pymongo clients are not fork-safe). Analytics
+# scans pass analytics=True to read from secondaries when there are any.
+# Set MONGO_MOCK=1 to run against an in-process mongomock database.
+# Settings are read when the client is created, so values loaded later by
+# load_dotenv() still apply.
+
+# Environment variable -> client option, with its default
+CLIENT_OPTIONS = {
+    "MONGO_MAX_POOL_SIZE": ("maxPoolSize", 50),
+    "MONGO_MIN_POOL_SIZE": ("minPoolSize", 0),
+    "MONGO_SERVER_SELECTION_TIMEOUT_MS": ("serverSelectionTimeoutMS", 5000),
+    "MONGO_CONNECT_TIMEOUT_MS": ("connectTimeoutMS", 5000),
+    "MONGO_SOCKET_TIMEOUT_MS": ("socketTimeoutMS", 30000),
+    "MONGO_MAX_IDLE_TIME_MS": ("maxIdleTimeMS", 60000),
+}
+
+_client = None
+_client_pid = None
+_lock = threading.Lock()
+
+
+def database_name() -> str:
+    return os.getenv("MONGO_DB_NAME", "users")
+
+
+def client_options() -> dict:
+    options = {option: int(os.getenv(name, default)) for name, (option, default) in CLIENT_OPTIONS.items()}
+    options.update(retryReads=True, retryWrites=True, appname=os.getenv("MONGO_APP_NAME", "ai-services"))
+    return options
+
+
+def _create_client():
+    if os.getenv("MONGO_MOCK", "false").lower() in ("1", "true", "yes"):
+        return mock_client()
+    return MongoClient(os.getenv("MONGO_URI"), **client_options())
+
+
+def mock_client():
+    """An in-process mongomock client, for tests and benchmarks"""
+    try:
+        import mongomock
+    except ImportError as e:
+        raise ImportError("MONGO_MOCK requires the mongomock package (pip install mongomock)") from e
+    return mongomock.MongoClient()
+
+
+def get_client() -> MongoClient:
+    """The process-wide client, created on first use and after a fork"""
+    global _client, _client_pid
+    pid = os.getpid()
+    if _client is None or _client_pid != pid:
+        with _lock:
+            if _client is None or _client_pid != pid:
+                # A client inherited through fork is dropped, not closed: its
+                # sockets belong to the parent
+                _client = _create_client()
+                _client_pid = pid
+                logger.info("MongoDB client created for pid %d", pid)
+    return _client
+
+
+def use_client(client) -> None:
+    """Install client, e.g. a mongomock client, as the process-wide client"""
+    global _client, _client_pid
+    with _lock:
+        _client = client
+        _client_pid = os.getpid()
+
+
+def get_db(analytics: bool = False) -> Database:
+    """The application database; analytics reads prefer secondaries"""
+    client = get_client()
+    if analytics:
+        return client.get_database(database_name(), read_preference=ReadPreference.SECONDARY_PREFERRED)
+    return client[database_name()]
+
+
+def close_client() -> None:
+    global _client, _client_pid
+    with _lock:
+        if _client is not None and _client_pid == os.getpid():
+            _client.close()
+        _client = None
+        _client_pid = None
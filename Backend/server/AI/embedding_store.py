@@ -0,0 +1,204 @@
+import os
+import threading
+from contextlib import contextmanager
+import numpy as np
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking, one process per store
+    fcntl = None
+
+
+class EmbeddingStore:
+    """Persistent on-disk store of embeddings keyed by document id and text hash.
+
+    Vectors are appended to a raw float32 matrix file (``<name>.f32``) that is
+    memory-mapped for reads. A tab-separated sidecar log (``<name>.ids``) maps
+    each key to its row and to the hash of the text it was computed from; the
+    last line for a key wins, and an empty hash marks the key as deleted.
+    A cached vector is only returned when the caller's text hash matches, so a
+    changed document is transparently re-embedded.
+
+    Several processes (e.g. gunicorn workers) may share the files. Writers
+    hold an exclusive flock on ``<name>.lock`` and readers a shared one, and
+    each process catches up on the others' appends, or reloads after their
+    compaction, whenever it takes the lock.
+    """
+
+    def __init__(self, directory: str, name: str, dimension: int):
+        os.makedirs(directory, exist_ok=True)
+        self.dimension = dimension
+        self.matrix_path = os.path.join(directory, f"{name}.f32")
+        self.ids_path = os.path.join(directory, f"{name}.ids")
+        self.lock_path = os.path.join(directory, f"{name}.lock")
+        self._rows: Dict[str, Tuple[int, str]] = {}  # key -> (row, text hash)
+        self._count: int = 0
+        self._log_offset: int = 0  # bytes of the ids log already applied
+        self._files: tuple = ()  # identity of the files _rows was read from
+        self._matrix: Optional[np.memmap] = None
+        self._lock = threading.Lock()
+        self._lock_fd: Optional[int] = None
+        self._lock_pid: Optional[int] = None
+        with self._locked(exclusive=True):
+            pass  # initial load, repairing any torn tail
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    @property
+    def dead_rows(self) -> int:
+        """Rows in the matrix file that no key points to any more"""
+        return self._count - len(self._rows)
+
+    def _lock_file(self) -> Optional[int]:
+        # flock locks belong to the open file, which a forked child shares
+        # with its parent: open it once per process
+        if fcntl is None:
+            return None
+        if self._lock_pid != os.getpid():
+            self._lock_fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+            self._lock_pid = os.getpid()
+        return self._lock_fd
+
+    @contextmanager
+    def _locked(self, exclusive: bool):
+        with self._lock:
+            fd = self._lock_file()
+            if fd is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                self._sync(repair=exclusive)
+                yield
+            finally:
+                if fd is not None:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+
+    def _identity(self) -> tuple:
+        identity = []
+        for path in (self.matrix_path, self.ids_path):
+            try:
+                stat = os.stat(path)
+                identity.append((stat.st_dev, stat.st_ino))
+            except FileNotFoundError:
+                identity.append(None)
+        return tuple(identity)
+
+    def _sync(self, repair: bool) -> None:
+        """Apply what other processes wrote since the last call.
+
+        Must run under the file lock. With repair (exclusive lock, so no
+        append can be in progress) a torn tail left by a crashed writer is
+        truncated, keeping later appends aligned.
+        """
+        identity = self._identity()
+        shrunk = identity[1] is not None and os.path.getsize(self.ids_path) < self._log_offset
+        if identity != self._files or shrunk:
+            # Created or compacted since we read them (shrunk: compacted into
+            # a reused inode): start over
+            self._rows = {}
+            self._log_offset = 0
+            self._matrix = None
+            self._files = identity
+
+        self._count = 0
+        if identity[0] is not None:
+            row_bytes = 4 * self.dimension
+            size = os.path.getsize(self.matrix_path)
+            self._count = size // row_bytes
+            if repair and size != self._count * row_bytes:
+                os.truncate(self.matrix_path, self._count * row_bytes)
+        if identity[1] is None:
+            return
+        with open(self.ids_path, 'rb') as f:
+            f.seek(self._log_offset)
+            log = f.read()
+        complete = log.rfind(b'\n') + 1
+        if repair and complete != len(log):
+            # A torn last line would be glued to the next appended entry
+            os.truncate(self.ids_path, self._log_offset + complete)
+        self._log_offset += complete
+        for line in log[:complete].decode('utf-8', errors='replace').splitlines():
+            try:
+                key, text_hash, row = line.split('\t')
+                row = int(row)
+            except ValueError:
+                continue  # garbled entry
+            if not text_hash:
+                self._rows.pop(key, None)
+            elif row < self._count:
+                self._rows[key] = (row, text_hash)
+
+    def _view(self) -> Optional[np.memmap]:
+        if self._count == 0:
+            return None
+        if self._matrix is None or len(self._matrix) != self._count:
+            self._matrix = np.memmap(
+                self.matrix_path, dtype='float32', mode='r',
+                shape=(self._count, self.dimension)
+            )
+        return self._matrix
+
+    def get(self, key: str, text_hash: str) -> Optional[np.ndarray]:
+        """Return the stored vector for key if it was computed from text_hash"""
+        found = self.get_many([key], [text_hash])
+        return found.get(0)
+
+    def get_many(self, keys: List[str], text_hashes: List[str]) -> Dict[int, np.ndarray]:
+        """Look up several keys at once, returning {position in keys: vector}"""
+        with self._locked(exclusive=False):
+            positions = []
+            rows = []
+            for i, (key, text_hash) in enumerate(zip(keys, text_hashes)):
+                entry = self._rows.get(key)
+                if entry and entry[1] == text_hash:
+                    positions.append(i)
+                    rows.append(entry[0])
+            if not rows:
+                return {}
+            vectors = np.array(self._view()[rows])
+        return dict(zip(positions, vectors))
+
+    def put_many(self, keys: List[str], text_hashes: List[str], vectors: np.ndarray) -> None:
+        """Append vectors for keys, superseding any previous entries"""
+        vectors = np.ascontiguousarray(vectors, dtype='float32').reshape(-1, self.dimension)
+        if len(vectors) == 0:
+            return
+        with self._locked(exclusive=True):
+            # Rows first, so a log entry never points past the matrix
+            with open(self.matrix_path, 'ab') as f:
+                f.write(vectors.tobytes())
+            with open(self.ids_path, 'a', encoding='utf-8') as f:
+                f.writelines(
+                    f"{key}\t{text_hash}\t{self._count + i}\n"
+                    for i, (key, text_hash) in enumerate(zip(keys, text_hashes))
+                )
+            self._sync(repair=False)
+
+    def discard(self, keys: Iterable[str]) -> None:
+        """Forget keys; their rows are reclaimed by the next compact()"""
+        with self._locked(exclusive=True):
+            removed = [key for key in keys if key in self._rows]
+            if removed:
+                with open(self.ids_path, 'a', encoding='utf-8') as f:
+                    f.writelines(f"{key}\t\t0\n" for key in removed)
+                self._sync(repair=False)
+
+    def compact(self) -> None:
+        """Rewrite the files keeping only live rows"""
+        with self._locked(exclusive=True):
+            keys = list(self._rows)
+            view = self._view()
+            vectors = (
+                np.array(view[[self._rows[key][0] for key in keys]])
+                if keys else np.empty((0, self.dimension), dtype='float32')
+            )
+            self._matrix = None  # release the mapping before replacing the file
+
+            with open(self.matrix_path + '.tmp', 'wb') as f:
+                f.write(vectors.tobytes())
+            with open(self.ids_path + '.tmp', 'w', encoding='utf-8') as f:
+                f.writelines(f"{key}\t{self._rows[key][1]}\t{row}\n" for row, key in enumerate(keys))
+            os.replace(self.matrix_path + '.tmp', self.matrix_path)
+            os.replace(self.ids_path + '.tmp', self.ids_path)
+            self._sync(repair=False)  # new files: reloads from them
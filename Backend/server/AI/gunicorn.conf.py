@@ -0,0 +1,51 @@
+"""Gunicorn settings for the AI services.
+
+Usage: gunicorn -c gunicorn.conf.py ai_server:app
+
+All services run in one app (see ai_server.py), on the ports the Node
+server already calls. The app is imported once in the master process
+before workers are forked, so models loaded at import time are shared
+copy-on-write between workers. Set PROMETHEUS_MULTIPROC_DIR to aggregate
+metrics across workers.
+"""
+import gc
+import os
+
+# Legacy service ports: hiring, recommendation, resume parser, interview score
+bind = os.getenv(
+    "GUNICORN_BIND", "127.0.0.1:5000,127.0.0.1:5001,127.0.0.1:5002,127.0.0.1:7000"
+).split(",")
+workers = int(os.getenv("GUNICORN_WORKERS", 2))
+# Threaded WSGI workers: each worker serves up to `threads` requests at once.
+# The Flask handlers are synchronous, so an async worker class gains nothing
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+threads = int(os.getenv("GUNICORN_THREADS", 8))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 120))
+preload_app = True
+
+
+def when_ready(server):
+    # Move everything loaded so far out of the collector's reach: collections
+    # in a worker would otherwise write to the shared pages and copy them
+    gc.freeze()
+
+
+def child_exit(server, worker):
+    # Drop the dead worker's live gauges from the multiprocess metrics
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
+
+
+def post_fork(server, worker):
+    # Start the background refreshers in each worker, never in the master: a
+    # thread in the master could hold a lock at fork time and deadlock the
+    # child. The first builds run in those threads, outside the worker timeout.
+    # Cluster syncs take a Mongo lease, so only one worker runs each of them.
+    import sys
+    service = sys.modules.get("recommendation_service")
+    if service is not None:
+        service.recommender.start_background_refresh()
+    clustering = sys.modules.get("clustering")
+    if clustering is not None:
+        clustering.start_background_sync()
@@ -1,86 +1,159 @@
 from flask import Flask, request, jsonify
+import os
 import joblib
 import numpy as np
 from flask_cors import CORS
+from metrics import init_metrics, time_inference
+from skill_vocabulary import vocabulary
 
 app = Flask(__name__)
 CORS(app)  # Allow requests from your frontend
+init_metrics(app, "hiring")
 
-# Load model and scaler
-model = joblib.load('hiring_model.pkl')
-scaler = joblib.load('scaler.pkl')
+# Load model and scaler, next to this file whatever the working directory
+MODEL_DIR = os.path.dirname(os.path.abspath(__file__))
+model = joblib.load(os.path.join(MODEL_DIR, 'hiring_model.pkl'))
+scaler = joblib.load(os.path.join(MODEL_DIR, 'scaler.pkl'))
 
 @app.route('/predict-from-skills', methods=['POST'])
 def predict_from_skills():
     try:
         data = request.get_json()
         
-        # Extract data from request
-        candidate_skills = data.get('candidate_skills', [])
-        job_skills = data.get('job_skills', [])
-        candidate_exp = float(data.get('candidate_exp', 0))
-        required_exp = float(data.get('required_exp', 1))
-        candidate_edu = data.get('candidate_education', '')
-        required_edu = data.get('required_education', '')
+        features = build_features([data])
+        hired, confidence = score_features(features)
         
-        # Calculate matches (same functions as in React)
-        skill_match = calculate_skill_match(candidate_skills, job_skills)
-        exp_match = calculate_experience_match(candidate_exp, required_exp)
-        education_match = calculate_education_match(candidate_edu, required_edu)
+        return jsonify({**format_result(features[0], hired[0], confidence[0]), 'status': 'success'})
         
-        # Prepare input for model
-        input_data = np.array([[skill_match, exp_match, education_match]])
-        input_scaled = scaler.transform(input_data)
+    except ValueError as e:
+        return jsonify({
+            'error': str(e),
+            'status': 'failed'
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'error': str(e),
+            'status': 'failed'
+        }), 500
+
+@app.route('/predict-from-skills/batch', methods=['POST'])
+def predict_from_skills_batch():
+    try:
+        data = request.get_json()
+        pairs = data.get('pairs') if isinstance(data, dict) else None
+        if not isinstance(pairs, list) or not pairs:
+            return jsonify({
+                'error': 'pairs must be a non-empty list',
+                'status': 'failed'
+            }), 400
         
-        # Get prediction
-        prediction = model.predict(input_scaled)
-        confidence = float(np.max(model.predict_proba(input_scaled)[0]))
+        features = build_features(pairs)
+        hired, confidence = score_features(features)
         
         return jsonify({
-            'hired': int(prediction[0]),
-            'confidence': confidence,
-            'matches': {
-                'skill_match': skill_match,
-                'exp_match': exp_match,
-                'education_match': education_match
-            },
+            'results': [format_result(*row) for row in zip(features, hired, confidence)],
             'status': 'success'
         })
         
+    except ValueError as e:
+        return jsonify({
+            'error': str(e),
+            'status': 'failed'
+        }), 400
     except Exception as e:
         return jsonify({
             'error': str(e),
             'status': 'failed'
         }), 500
 
+def build_features(pairs):
+    """Feature matrix [skill_match, exp_match, education_match] for candidate/job pairs.
+
+    Each pair uses the same fields as /predict-from-skills; the experience and
+    education matches are computed for all pairs at once. Raises ValueError
+    for a pair that is not an object or has a non-numeric experience.
+    """
+    for i, pair in enumerate(pairs):
+        if not isinstance(pair, dict):
+            raise ValueError(f'pair {i} must be an object')
+    n = len(pairs)
+    skill_match = np.fromiter(
+        (calculate_skill_match(p.get('candidate_skills', []), p.get('job_skills', [])) for p in pairs),
+        dtype=float, count=n
+    )
+    
+    try:
+        candidate_exp = np.fromiter((float(p.get('candidate_exp', 0)) for p in pairs), dtype=float, count=n)
+        required_exp = np.fromiter((float(p.get('required_exp', 1)) for p in pairs), dtype=float, count=n)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f'candidate_exp and required_exp must be numbers: {e}') from e
+    exp_match = calculate_experience_match(candidate_exp, required_exp)
+    
+    education_match = calculate_education_match(
+        [p.get('candidate_education', '') for p in pairs],
+        [p.get('required_education', '') for p in pairs]
+    )
+    
+    return np.column_stack([skill_match, exp_match, education_match])
+
+def score_features(features):
+    """Hire labels and confidences from a single predict_proba pass"""
+    with time_inference("hiring_model"):
+        probabilities = model.predict_proba(scaler.transform(features))
+    best = probabilities.argmax(axis=1)
+    return model.classes_[best], probabilities[np.arange(len(best)), best]
+
+def format_result(features, hired, confidence):
+    skill_match, exp_match, education_match = (float(value) for value in features)
+    return {
+        'hired': int(hired),
+        'confidence': float(confidence),
+        'matches': {
+            'skill_match': skill_match,
+            'exp_match': exp_match,
+            'education_match': education_match
+        }
+    }
+
 # Add these helper functions
 def calculate_skill_match(candidate_skills, job_skills):
     if not candidate_skills or not job_skills:
         return 0
-    candidate_skills = set(skill.lower().strip() for skill in candidate_skills)
-    job_skills = set(skill.lower().strip() for skill in job_skills)
-    matches = sum(1 for skill in job_skills if skill in candidate_skills)
-    return matches / len(job_skills) if job_skills else 0
+    # Cached skill sets: known skills overlap by popcount, aliases count as matches
+    job_set = vocabulary.skill_set(job_skills)
+    required = len(job_set)
+    if not required:
+        return 0
+    return len(vocabulary.skill_set(candidate_skills) & job_set) / required
 
 def calculate_experience_match(candidate_exp, required_exp):
-    if required_exp == 0:
-        return 1
-    return min(1, candidate_exp / required_exp)
+    """Share of the required experience the candidate has, capped at 1 (element-wise)"""
+    candidate_exp = np.asarray(candidate_exp, dtype=float)
+    required_exp = np.asarray(required_exp, dtype=float)
+    no_requirement = required_exp == 0
+    return np.where(
+        no_requirement, 1.0,
+        np.minimum(1, candidate_exp / np.where(no_requirement, 1, required_exp))
+    )
+
+EDUCATION_LEVELS = {
+    'high school': 1,
+    'bachelor': 2, 
+    'master': 3,
+    'phd': 4
+}
+
+def education_level(education):
+    return EDUCATION_LEVELS.get(str(education or '').lower(), 0)
 
 def calculate_education_match(candidate_edu, required_edu):
-    education_levels = {
-        'high school': 1,
-        'bachelor': 2, 
-        'master': 3,
-        'phd': 4
-    }
-    candidate_level = education_levels.get(candidate_edu.lower(), 0)
-    required_level = education_levels.get(required_edu.lower(), 0)
-    if candidate_level >= required_level:
-        return 1
-    if candidate_level >= required_level - 1:
-        return 0.5
-    return 0
+    """1 when the candidate meets the level, 0.5 one level below, else 0 (element-wise over lists)"""
+    candidate_level = np.array([education_level(e) for e in candidate_edu], dtype=float)
+    required_level = np.array([education_level(e) for e in required_edu], dtype=float)
+    return np.where(
+        candidate_level >= required_level, 1.0,
+        np.where(candidate_level >= required_level - 1, 0.5, 0.0)
+    )
 
 if __name__ == '__main__':
     app.run(port=5000)
\ No newline at end of file
@@ -1,21 +1,50 @@
+import io
 import os
 import re
-import spacy
+import time
+import hashlib
+import itertools
+import shutil
+import tempfile
+import threading
+import zipfile
+import multiprocessing
 import pdfplumber
-from flask import Flask, request, jsonify
-from werkzeug.utils import secure_filename
+from collections import OrderedDict
+from contextlib import closing
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
+from metrics import init_metrics, time_inference
+from skill_vocabulary import vocabulary
+from keyword_matcher import KeywordMatcher
 
 # Initialize Flask app
 app = Flask(__name__)
 CORS(app)
+init_metrics(app, "resume_parser")
 
-# Uploads folder
-UPLOAD_FOLDER = 'uploads/'
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+# spaCy model, loaded on first use by get_nlp(). Only tokenization and NER
+# are kept; the other components are never run by the extractors.
+SPACY_MODEL = "en_core_web_sm"
+SPACY_DISABLE = ["tagger", "parser", "attribute_ruler", "lemmatizer"]
+_nlp = None
+_nlp_lock = threading.Lock()
 
-# Load spaCy model
-nlp = spacy.load("en_core_web_sm")
+def get_nlp():
+    """The shared spaCy pipeline, loaded on first call"""
+    global _nlp
+    if _nlp is None:
+        with _nlp_lock:
+            if _nlp is None:
+                import spacy  # importing spaCy alone takes about a second
+                _nlp = spacy.load(SPACY_MODEL, disable=SPACY_DISABLE)
+    return _nlp
+
+# Set SPACY_PRELOAD=1 with gunicorn --preload to load the model once in the
+# master process; forked workers then share its memory copy-on-write
+if os.getenv("SPACY_PRELOAD") == "1":
+    get_nlp()
 
 # Load skills from file
 def load_skill_keywords():
@@ -28,9 +57,49 @@ def load_skill_keywords():
 
 skill_keywords = load_skill_keywords()
 
+LANGUAGE_MAP = {
+    "english": "English", "anglais": "English",
+    "french": "French", "français": "French",
+    "spanish": "Spanish", "español": "Spanish",
+    "arabic": "Arabic", "arabe": "Arabic",
+    "german": "German", "deutsch": "German",
+    "italian": "Italian", "italiano": "Italian",
+}
+
+# Compiled once at startup; each resume is scanned in a single pass per matcher
+skill_matcher = KeywordMatcher({skill: vocabulary.canonical(skill).capitalize() for skill in skill_keywords})
+language_matcher = KeywordMatcher(LANGUAGE_MAP)
+
+# Limits for huge or pathological uploads
+MAX_PDF_BYTES = int(os.getenv("MAX_PDF_BYTES", 10 * 1024 * 1024))
+MAX_PDF_PAGES = int(os.getenv("MAX_PDF_PAGES", 20))
+MAX_TEXT_CHARS = 200_000
+PAGE_TIME_BUDGET = float(os.getenv("PDF_PAGE_TIME_BUDGET", 2.0))  # seconds
+PDF_TIME_BUDGET = float(os.getenv("PDF_TIME_BUDGET", 10.0))  # seconds
+
+# Worker processes for bulk ingestion (pdfplumber is CPU-bound)
+RESUME_WORKERS = int(os.getenv("RESUME_WORKERS", os.cpu_count() or 1))
+
+# Parsed resumes kept per distinct PDF (SHA-256 of its bytes)
+RESUME_CACHE_SIZE = int(os.getenv("RESUME_CACHE_SIZE", 512))
+RESUME_CACHE_TTL = float(os.getenv("RESUME_CACHE_TTL", 3600))  # seconds
+
+# Extraction stops once each of these sections has been followed by another
+# header: every section process_resume reads, including the skills and
+# languages lists the keyword scans rely on
+REQUIRED_SECTIONS = {'summary', 'experience', 'education', 'skills', 'languages'}
+
+HORIZONTAL_SPACE = re.compile(r'[ \t\f\v]+')
+
 # Helper cleaning
 def clean_text(text):
-    return re.sub(r'\s+', ' ', text).replace('\r', '').replace('\t', '').strip()
+    """Collapse runs of spaces and tabs, drop blank lines, keep the line structure.
+
+    Leading indentation is reduced to one space rather than removed, since it
+    marks continuation lines in the experience section.
+    """
+    lines = (HORIZONTAL_SPACE.sub(' ', line).rstrip() for line in text.replace('\r', '').split('\n'))
+    return '\n'.join(line for line in lines if line.strip())
 
 # Extractors
 def extract_name(text):
@@ -51,114 +120,249 @@ def extract_phone(text):
         return '+' + phone if not phone.startswith('+') else phone
     return None
 
-def extract_education(text):
-    education = []
-    lines = text.split('\n')
-    capture = False
-    for line in lines:
-        if re.search(r'education|formation|academic background|études', line, re.IGNORECASE):
-            capture = True
+# Section header keywords, matched as whole words ("formation" does not
+# match "Information"). "other" sections are not extracted but still end
+# the previous section.
+SECTION_HEADERS = [
+    ('summary', r'summary|about\s+me|personal\s+profile|profile|profil'),
+    ('experience', r'professional\s+experiences?|exp[ée]riences?|work\s+history|emploi'),
+    ('education', r'education|formations?|academic\s+background|études'),
+    ('skills', r'skills|comp[ée]tences'),
+    ('languages', r'languages|langues'),
+    ('other', r'certifications?|projects|projets'),
+]
+SECTION_PATTERN = re.compile(
+    r'\b(?:' + '|'.join(f'(?P<{name}>{pattern})' for name, pattern in SECTION_HEADERS) + r')\b',
+    re.IGNORECASE
+)
+
+# Longer lines are body text that happens to mention a section keyword
+HEADER_MAX_WORDS = 6
+
+# Words a header may carry besides its keywords, e.g. "Work" in "Work Experience"
+HEADER_QUALIFIERS = 1
+HEADER_SEPARATORS = re.compile(r'[\s&/,|]+|\b(?:and|et)\b', re.IGNORECASE)
+
+EXPERIENCE_ENTRY = re.compile(r'^(.*?)\s*[-–]\s*(.*?)\s*[-–]\s*(.*)$')
+BULLET = re.compile(r'^[•\-]\s*(.*)')
+
+def section_headers(line):
+    """Section types named by the stripped line if it is a header, else ().
+
+    The whole line must be header keywords, at most HEADER_QUALIFIERS other
+    words and an optional trailing colon. Two-column layouts put headers
+    side by side ("Profile Education"), so a line may name several.
+    """
+    line = line.rstrip(':').rstrip()
+    if ':' in line or len(line.split()) > HEADER_MAX_WORDS:
+        return ()
+    headers = tuple(dict.fromkeys(match.lastgroup for match in SECTION_PATTERN.finditer(line)))
+    if not headers:
+        return ()
+    others = [word for word in HEADER_SEPARATORS.split(SECTION_PATTERN.sub(' ', line)) if word]
+    return headers if len(others) <= HEADER_QUALIFIERS else ()
+
+def segment_resume(text):
+    """Split resume text into typed sections in a single pass over its lines.
+
+    Returns {section type: raw non-blank lines}; lines before the first
+    header go to "header". A repeated section type (e.g. "Experience" again
+    on page 2) continues the existing section, and the lines after a header
+    naming several sections go to each of them.
+    """
+    sections = {'header': []}
+    current = [sections['header']]
+    for line in text.split('\n'):
+        stripped = line.strip()
+        if not stripped:
+            continue
+        headers = section_headers(stripped)
+        if headers:
+            current = [sections.setdefault(header, []) for header in headers]
             continue
-        if capture:
-            if re.search(r'experience|work history|skills|certification|projects|languages', line, re.IGNORECASE):
-                break
-            if line.strip():
-                education.append(line.strip())
-    return education
-
-def extract_experience(text):
+        for section in current:
+            section.append(line)
+    return sections
+
+def extract_education(sections):
+    return [line.strip() for line in sections.get('education', [])]
+
+def extract_experience(sections):
     experience = []
-    lines = text.split('\n')
     current_exp = {}
-    capture = False
-    for line in lines:
-        if re.search(r'experience|work history|professional experience|emploi', line, re.IGNORECASE):
-            capture = True
-            continue
-        if capture:
-            if re.search(r'education|formation|skills|certification|projects|languages', line, re.IGNORECASE):
-                break
-            exp_match = re.search(r'^(.*?)\s*[-–]\s*(.*?)\s*[-–]\s*(.*)$', line)
-            if exp_match:
-                if current_exp:
-                    experience.append(current_exp)
-                current_exp = {
-                    'company': exp_match.group(1).strip(),
-                    'title': exp_match.group(2).strip(),
-                    'duration': exp_match.group(3).strip(),
-                    'description': []
-                }
-            elif line.strip():
-                bullet_match = re.match(r'^[•\-]\s*(.*)', line.strip())
-                if bullet_match:
-                    current_exp.setdefault('description', []).append(bullet_match.group(1))
-                elif current_exp and current_exp.get('description'):
-                    if re.match(r'^\s+', line):
-                        current_exp['description'][-1] += ' ' + line.strip()
+    for line in sections.get('experience', []):
+        exp_match = EXPERIENCE_ENTRY.search(line)
+        if exp_match:
+            if current_exp:
+                experience.append(current_exp)
+            current_exp = {
+                'company': exp_match.group(1).strip(),
+                'title': exp_match.group(2).strip(),
+                'duration': exp_match.group(3).strip(),
+                'description': []
+            }
+        else:
+            bullet_match = BULLET.match(line.strip())
+            if bullet_match:
+                current_exp.setdefault('description', []).append(bullet_match.group(1))
+            elif current_exp and current_exp.get('description'):
+                if line[:1].isspace():
+                    current_exp['description'][-1] += ' ' + line.strip()
     if current_exp:
         experience.append(current_exp)
     return experience
 
 def extract_skills(text):
-    skills = set()
-    text_lower = text.lower()
-    for skill in skill_keywords:
-        if re.search(rf'\b{re.escape(skill)}\b', text_lower):
-            skills.add(skill.capitalize())
-    return sorted(list(skills))
+    return sorted(skill_matcher.find(text))
+
+def extract_skill_matches(text):
+    return skill_matcher.matches(text)
 
 def extract_languages(text):
-    language_map = {
-        "english": "English", "anglais": "English",
-        "french": "French", "français": "French",
-        "spanish": "Spanish", "español": "Spanish",
-        "arabic": "Arabic", "arabe": "Arabic",
-        "german": "German", "deutsch": "German",
-        "italian": "Italian", "italiano": "Italian",
-    }
-    languages = set()
-    text_lower = text.lower()
-    for lang_key, lang_value in language_map.items():
-        if re.search(rf'\b{re.escape(lang_key)}\b', text_lower):
-            languages.add(lang_value)
-    return sorted(list(languages))
-
-def extract_summary(text):
-    lines = text.split('\n')
-    summary = []
-    capture = False
-    for line in lines:
-        if re.search(r'(summary|about\s+me|profile|profil|personal\s+profile)', line, re.IGNORECASE):
-            capture = True
-            continue
-        if capture:
-            if re.search(r'experience|education|skills|languages', line, re.IGNORECASE):
-                break
-            if line.strip():
-                summary.append(line.strip())
+    return sorted(language_matcher.find(text))
+
+def extract_summary(sections):
+    summary = [line.strip() for line in sections.get('summary', [])]
     return ' '.join(summary) if summary else None
 
-def extract_text_from_pdf(file_path):
-    text = ''
+def pdf_size(source):
+    """Size in bytes of a PDF path or seekable file object"""
+    if isinstance(source, (str, os.PathLike)):
+        return os.path.getsize(source)
+    position = source.tell()
+    source.seek(0, os.SEEK_END)
+    size = source.tell()
+    source.seek(position)
+    return size
+
+def worker_context():
+    # Forking a multithreaded server can hand a worker a lock held by another
+    # thread; forkserver/spawn workers start from a clean process instead
+    if 'forkserver' not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('spawn')
+    context = multiprocessing.get_context('forkserver')
+    # The server imports this module once, so workers start without
+    # re-importing it (takes effect when the server is first started)
+    context.set_forkserver_preload(['iA4'])
+    return context
+
+def iter_pdf_pages(source, max_pages=MAX_PDF_PAGES):
+    """Yield the cleaned text of each page (possibly empty), one page at a time.
+
+    Stops after max_pages or after MAX_TEXT_CHARS characters of text. Runs
+    in the calling process with no time limit: see iter_pdf_pages_timed.
+    """
+    chars = 0
+    # Only the first max_pages pages are parsed into page objects
+    with pdfplumber.open(source, pages=range(1, max_pages + 1)) as pdf:
+        for number, page in enumerate(pdf.pages, 1):
+            page_text = clean_text(page.extract_text() or '')
+            page.flush_cache()  # release parsed layout objects as we go
+            yield page_text
+
+            chars += len(page_text)
+            if chars > MAX_TEXT_CHARS:
+                print(f"⚠️ PDF text limit reached after {number} pages")
+                return
+
+def _send_pdf_pages(source, max_pages, connection):
+    """Child process body of iter_pdf_pages_timed"""
+    try:
+        if isinstance(source, bytes):
+            source = io.BytesIO(source)
+        for page_text in iter_pdf_pages(source, max_pages):
+            connection.send(('page', page_text))
+        connection.send(('done', None))
+    except Exception as e:
+        connection.send(('error', str(e)))
+    finally:
+        connection.close()
+
+def iter_pdf_pages_timed(source, max_pages=MAX_PDF_PAGES):
+    """iter_pdf_pages in a child process, yielding the non-empty pages.
+
+    A page extraction cannot be interrupted in-process, so the child is
+    killed as soon as one page takes longer than PAGE_TIME_BUDGET or the
+    document longer than PDF_TIME_BUDGET, and iteration stops there. It is
+    also killed when the caller stops iterating early.
+    """
+    if not isinstance(source, (str, os.PathLike)):
+        source.seek(0)
+        source = source.read()
+    context = worker_context()
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_send_pdf_pages, args=(source, max_pages, sender), daemon=True)
+    process.start()
+    sender.close()
+
+    deadline = time.monotonic() + PDF_TIME_BUDGET
+    try:
+        for number in itertools.count(1):
+            timeout = min(PAGE_TIME_BUDGET, deadline - time.monotonic())
+            if timeout <= 0 or not receiver.poll(timeout):
+                print(f"⚠️ PDF extraction budget exhausted on page {number}, stopping")
+                return
+            try:
+                kind, value = receiver.recv()
+            except EOFError:
+                raise RuntimeError('PDF extraction process died')
+            if kind == 'error':
+                raise RuntimeError(value)
+            if kind == 'done':
+                return
+            if value:
+                yield value
+    finally:
+        receiver.close()
+        if process.is_alive():
+            process.kill()
+        process.join()
+
+def extract_text_from_pdf(source, stop_when_complete=True):
+    """Extract text from a PDF path or file object, keeping one line per text line.
+
+    Files larger than MAX_PDF_BYTES are rejected. With stop_when_complete,
+    pages stop being read once every REQUIRED_SECTIONS header has been
+    followed by another header, i.e. those sections are fully captured.
+    """
+    pages = []
     try:
-        with pdfplumber.open(file_path) as pdf:
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + '\n'
+        size = pdf_size(source)
+        if size > MAX_PDF_BYTES:
+            print(f"❌ PDF too large: {size} bytes (limit {MAX_PDF_BYTES})")
+            return ''
+
+        completed = set()
+        current_sections = ()
+        # Closed on an early stop, which kills the extraction process
+        with closing(iter_pdf_pages_timed(source)) as page_texts:
+            for page_text in page_texts:
+                pages.append(page_text)
+                if not stop_when_complete:
+                    continue
+                for line in page_text.split('\n'):
+                    headers = section_headers(line.strip())
+                    if headers:
+                        completed.update(current_sections)
+                        current_sections = headers
+                if REQUIRED_SECTIONS <= completed:
+                    break
     except Exception as e:
         print(f"❌ Error reading PDF: {e}")
-    return clean_text(text)
+    return '\n'.join(pages)
 
 def process_resume(file_path):
     text = extract_text_from_pdf(file_path)
     if not text or len(text) < 50:
         return {'error': 'Extracted text is too short or empty'}
 
+    sections = segment_resume(text)
+    phone = extract_phone(text)
+
     return {
         "name": extract_name(text),
         "email": extract_email(text),
-        "phone": extract_phone(text),
+        "phone": phone,
         "role": "CANDIDATE",
         "isActive": True,
         "verificationStatus": {
@@ -166,9 +370,9 @@ def process_resume(file_path):
             "emailVerified": False
         },
         "profile": {
-            "resume": extract_summary(text) or "",
+            "resume": extract_summary(sections) or "",
             "skills": extract_skills(text),
-            "phone": extract_phone(text),
+            "phone": phone,
             "languages": extract_languages(text),
             "availability": "Full-time",
             "experience": [{
@@ -176,11 +380,153 @@ def process_resume(file_path):
                 "company": exp.get('company', ''),
                 "duration": exp.get('duration', ''),
                 "description": ' '.join(exp.get('description', []))
-            } for exp in extract_experience(text)]
+            } for exp in extract_experience(sections)]
         },
-        "education": extract_education(text)
+        "education": extract_education(sections),
+        "skill_matches": extract_skill_matches(text)
     }
 
+def parse_resume_file(name, source):
+    """Parse one resume in a worker process and return an NDJSON record.
+
+    source is a path or the PDF bytes. Failures are reported in the record
+    rather than raised, so one bad file never stops a bulk import.
+    """
+    started = time.perf_counter()
+    try:
+        if isinstance(source, bytes):
+            source = io.BytesIO(source)
+        resume = process_resume(source)
+        error = resume.get('error')
+    except Exception as e:
+        resume, error = None, f'Processing error: {e}'
+
+    record = {'file': name, 'status': 'failed' if error else 'ok'}
+    if error:
+        record['error'] = error
+    else:
+        record['resume'] = resume
+    record['seconds'] = round(time.perf_counter() - started, 3)
+    return record
+
+def iter_resume_sources(source):
+    """Yield (name, path or bytes) for each PDF in a directory or zip archive.
+
+    source is a directory path, a zip path or a seekable zip file object.
+    Archive members that are too large or cannot be read (bad CRC, corrupt
+    data) are yielded with the exception instead of their bytes, so they
+    become per-file failures rather than ending the import.
+    """
+    if isinstance(source, (str, os.PathLike)) and os.path.isdir(source):
+        for root, dirs, files in os.walk(source):
+            dirs.sort()
+            for filename in sorted(files):
+                if filename.lower().endswith('.pdf'):
+                    path = os.path.join(root, filename)
+                    yield os.path.relpath(path, source), path
+        return
+
+    with zipfile.ZipFile(source) as archive:
+        for info in archive.infolist():
+            name = info.filename
+            if info.is_dir() or not name.lower().endswith('.pdf') or name.startswith('__MACOSX/'):
+                continue
+            if info.file_size > MAX_PDF_BYTES:
+                yield name, ValueError(f'PDF too large: {info.file_size} bytes (limit {MAX_PDF_BYTES})')
+                continue
+            try:
+                data = archive.read(info)
+            except (zipfile.BadZipFile, zipfile.LargeZipFile, NotImplementedError, OSError, EOFError) as e:
+                yield name, e
+                continue
+            yield name, data
+
+def ingest_resumes(sources, workers=RESUME_WORKERS):
+    """Parse (name, source) pairs in a process pool, yielding records as they finish.
+
+    At most two files per worker are in flight, so a large archive is never
+    held in memory at once. The last record is a summary with throughput.
+    """
+    started = time.perf_counter()
+    parsed = failed = 0
+    max_pending = 2 * workers
+
+    def finished(records):
+        nonlocal parsed, failed
+        for record in records:
+            if record['status'] == 'ok':
+                parsed += 1
+            else:
+                failed += 1
+                print(f"❌ {record['file']}: {record['error']}")
+            yield record
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=worker_context()) as executor:
+        pending = {}
+        for name, source in sources:
+            if isinstance(source, Exception):
+                yield from finished([{'file': name, 'status': 'failed', 'error': str(source), 'seconds': 0}])
+                continue
+            pending[executor.submit(parse_resume_file, name, source)] = name
+            if len(pending) >= max_pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                yield from finished(_results(done, pending))
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            yield from finished(_results(done, pending))
+
+    elapsed = time.perf_counter() - started
+    total = parsed + failed
+    print(f"✅ Ingested {total} resumes in {elapsed:.1f}s ({parsed} ok, {failed} failed)")
+    yield {'summary': {
+        'files': total,
+        'parsed': parsed,
+        'failed': failed,
+        'seconds': round(elapsed, 3),
+        'files_per_second': round(total / elapsed, 2) if elapsed else None
+    }}
+
+def _results(done, pending):
+    """Records of the finished futures, removed from pending"""
+    for future in done:
+        name = pending.pop(future)
+        try:
+            yield future.result()
+        except Exception as e:  # the worker process itself died
+            yield {'file': name, 'status': 'failed', 'error': f'Worker error: {e}', 'seconds': None}
+
+class ResultCache:
+    """Thread-safe LRU cache whose entries also expire after ttl seconds"""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+resume_cache = ResultCache(RESUME_CACHE_SIZE, RESUME_CACHE_TTL)
+
 # Home route (for checking server)
 @app.route('/', methods=['GET'])
 def home():
@@ -199,19 +545,53 @@ def upload_resume():
     if not file.filename.lower().endswith('.pdf'):
         return jsonify({'error': 'Only PDF files are accepted'}), 400
 
-    filename = secure_filename(file.filename)
-    file_path = os.path.join(UPLOAD_FOLDER, filename)
-    file.save(file_path)
+    # Parsed from memory: nothing touches the disk and concurrent uploads
+    # sharing a filename cannot collide
+    data = file.read(MAX_PDF_BYTES + 1)
+    if len(data) > MAX_PDF_BYTES:
+        return jsonify({'error': f'File exceeds {MAX_PDF_BYTES} bytes'}), 413
+
+    digest = hashlib.sha256(data).hexdigest()
+    cached = resume_cache.get(digest)
+    if cached is not None:
+        return jsonify(cached)
 
     try:
-        extracted = process_resume(file_path)
+        with time_inference("resume_parser"):
+            extracted = process_resume(io.BytesIO(data))
+        if 'error' not in extracted:
+            resume_cache.put(digest, extracted)
         return jsonify(extracted)
     except Exception as e:
         print(f"❌ Resume processing error: {e}")
         return jsonify({'error': f'Processing error: {str(e)}'}), 500
-    finally:
-        if os.path.exists(file_path):
-            os.remove(file_path)
+
+# Bulk upload route: a zip of PDFs in, one NDJSON record per resume out
+@app.route('/upload/bulk', methods=['POST'])
+def upload_resumes_bulk():
+    archive = request.files.get('archive')
+    if archive is None or archive.filename == '':
+        return jsonify({'error': 'No archive provided'}), 400
+
+    if not archive.filename.lower().endswith('.zip'):
+        return jsonify({'error': 'Only zip archives are accepted'}), 400
+
+    # request.files is closed once the view returns, before the response is
+    # streamed: keep a copy, on disk so large archives stay out of memory
+    upload = tempfile.TemporaryFile()
+    shutil.copyfileobj(archive.stream, upload)
+    upload.seek(0)
+    if not zipfile.is_zipfile(upload):
+        upload.close()
+        return jsonify({'error': 'Invalid zip archive'}), 400
+    upload.seek(0)
+
+    def generate():
+        with upload:
+            for record in ingest_resumes(iter_resume_sources(upload)):
+                yield app.json.dumps(record) + '\n'
+
+    return Response(generate(), mimetype='application/x-ndjson')
 
 # Start server
 if __name__ == '__main__':
@@ -0,0 +1,121 @@
+import os
+import logging
+import faiss
+import numpy as np
+from dataclasses import dataclass
+
+logger = logging.getLogger(__name__)
+
+# Supported FAISS index families, all using inner-product (cosine) similarity
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw")
+
+# FAISS warns below ~39 training points per IVF cell
+MIN_POINTS_PER_CELL = 39
+
+
+@dataclass
+class IndexConfig:
+    """Index family and its build/search parameters"""
+    index_type: str = "flat"
+    nlist: int = 1024  # IVF cells
+    nprobe: int = 16  # IVF cells visited per query
+    pq_m: int = 16  # PQ sub-quantizers, must divide the embedding dimension
+    pq_bits: int = 8  # bits per PQ code
+    hnsw_m: int = 32  # HNSW graph degree
+    ef_construction: int = 200
+    ef_search: int = 64
+
+    def __post_init__(self):
+        if self.index_type not in INDEX_TYPES:
+            raise ValueError(f"Unknown index type '{self.index_type}', expected one of {INDEX_TYPES}")
+
+    @classmethod
+    def from_env(cls) -> "IndexConfig":
+        """Read the configuration from JOB_INDEX_* environment variables"""
+        defaults = cls()
+        return cls(
+            index_type=os.getenv("JOB_INDEX_TYPE", defaults.index_type).lower(),
+            nlist=int(os.getenv("JOB_INDEX_NLIST", defaults.nlist)),
+            nprobe=int(os.getenv("JOB_INDEX_NPROBE", defaults.nprobe)),
+            pq_m=int(os.getenv("JOB_INDEX_PQ_M", defaults.pq_m)),
+            pq_bits=int(os.getenv("JOB_INDEX_PQ_BITS", defaults.pq_bits)),
+            hnsw_m=int(os.getenv("JOB_INDEX_HNSW_M", defaults.hnsw_m)),
+            ef_construction=int(os.getenv("JOB_INDEX_EF_CONSTRUCTION", defaults.ef_construction)),
+            ef_search=int(os.getenv("JOB_INDEX_EF_SEARCH", defaults.ef_search))
+        )
+
+    @property
+    def supports_removal(self) -> bool:
+        """HNSW graphs cannot drop vectors and must be rebuilt instead"""
+        return self.index_type != "hnsw"
+
+
+def _inner_index(index: faiss.Index) -> faiss.Index:
+    return faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap) else index
+
+
+def set_search_params(index: faiss.Index, config: IndexConfig) -> None:
+    """Apply nprobe/efSearch to an index returned by build_index"""
+    inner = _inner_index(index)
+    if isinstance(inner, faiss.IndexIVF):
+        inner.nprobe = min(config.nprobe, inner.nlist)
+    elif isinstance(inner, faiss.IndexHNSW):
+        inner.hnsw.efSearch = config.ef_search
+
+
+def search_parameters(
+    index: faiss.Index, config: IndexConfig, selector: faiss.IDSelector
+) -> faiss.SearchParameters:
+    """Per-query parameters restricting a search to selector's ids.
+
+    Passing parameters overrides the index-level nprobe/efSearch, so they are
+    carried over from config.
+    """
+    inner = _inner_index(index)
+    if isinstance(inner, faiss.IndexIVF):
+        return faiss.SearchParametersIVF(sel=selector, nprobe=min(config.nprobe, inner.nlist))
+    if isinstance(inner, faiss.IndexHNSW):
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=config.ef_search)
+    return faiss.SearchParameters(sel=selector)
+
+
+def build_index(config: IndexConfig, training_vectors: np.ndarray) -> faiss.Index:
+    """Create an empty index taking caller ids, trained on training_vectors if needed.
+
+    IVF indexes store ids in their inverted lists and are returned as is:
+    wrapped in an IndexIDMap, remove_ids would compact the id map without
+    renumbering the lists, mislabelling hits after any removal. Flat and HNSW
+    indexes are wrapped in an IndexIDMap.
+
+    Quantized families fall back to a smaller nlist, or to a flat index, when
+    there are too few vectors to train them meaningfully.
+    """
+    n, dimension = training_vectors.shape
+    index_type = config.index_type
+    nlist = min(config.nlist, n // MIN_POINTS_PER_CELL)
+
+    if index_type.startswith("ivf") and nlist < 1:
+        logger.warning("%d vectors are too few to train %s, using flat index", n, index_type)
+        index_type = "flat"
+    if index_type == "ivf_pq" and n < 2 ** config.pq_bits:
+        logger.warning("%d vectors are too few to train PQ codebooks, using ivf_flat index", n)
+        index_type = "ivf_flat"
+
+    if index_type == "flat":
+        inner = faiss.IndexFlatIP(dimension)
+    elif index_type == "hnsw":
+        inner = faiss.IndexHNSWFlat(dimension, config.hnsw_m, faiss.METRIC_INNER_PRODUCT)
+        inner.hnsw.efConstruction = config.ef_construction
+    else:
+        quantizer = faiss.IndexFlatIP(dimension)
+        if index_type == "ivf_flat":
+            inner = faiss.IndexIVFFlat(quantizer, dimension, nlist, faiss.METRIC_INNER_PRODUCT)
+        else:
+            inner = faiss.IndexIVFPQ(
+                quantizer, dimension, nlist, config.pq_m, config.pq_bits, faiss.METRIC_INNER_PRODUCT
+            )
+        inner.train(np.ascontiguousarray(training_vectors, dtype='float32'))
+
+    index = inner if isinstance(inner, faiss.IndexIVF) else faiss.IndexIDMap(inner)
+    set_search_params(index, config)
+    return index
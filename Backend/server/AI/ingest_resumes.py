@@ -0,0 +1,33 @@
+"""Bulk-parse a directory or zip archive of PDF resumes into NDJSON.
+
+Usage: python ingest_resumes.py resumes.zip --workers 8 --output resumes.ndjson
+"""
+import argparse
+import json
+import os
+from iA4 import RESUME_WORKERS, ingest_resumes, iter_resume_sources
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('source', help='directory or zip archive of PDF resumes')
+    parser.add_argument('--workers', type=int, default=RESUME_WORKERS)
+    parser.add_argument('--output', help='NDJSON file to write, defaults to stdout')
+    args = parser.parse_args()
+
+    if args.output:
+        output = open(args.output, 'w', encoding='utf-8')
+    else:
+        # Keep the real stdout for records and point fd 1 at stderr, so
+        # progress messages, including those of the worker processes, stay
+        # out of the NDJSON stream
+        output = os.fdopen(os.dup(1), 'w', encoding='utf-8')
+        os.dup2(2, 1)
+    with output:
+        for record in ingest_resumes(iter_resume_sources(args.source), workers=args.workers):
+            output.write(json.dumps(record, ensure_ascii=False) + '\n')
+            output.flush()
+
+
+if __name__ == '__main__':
+    main()
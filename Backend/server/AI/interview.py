@@ -5,9 +5,73 @@ import whisper
 from transformers import pipeline, set_seed
 from fpdf import FPDF
 import re
+import threading
 from datetime import datetime
+import numpy as np
 import torch
 
+USE_CUDA = torch.cuda.is_available()
+WHISPER_MODEL = os.getenv("WHISPER_MODEL", "base" if USE_CUDA else "tiny")
+SUMMARY_MODEL = "moussaKam/barthez-orangesum-title"
+
+# 🧰 Registre des modèles : chaque modèle est chargé une seule fois par processus
+class ModelRegistry:
+    """Loads each registered model on first use and keeps it for the process"""
+
+    def __init__(self):
+        self._loaders = {}
+        self._warmups = {}
+        self._models = {}
+        self._locks = {}
+
+    def register(self, name, loader, warmup=None):
+        """loader() builds the model; warmup(model) runs a tiny inference"""
+        self._loaders[name] = loader
+        self._locks[name] = threading.Lock()
+        if warmup:
+            self._warmups[name] = warmup
+
+    def get(self, name):
+        model = self._models.get(name)
+        if model is None:
+            with self._locks[name]:  # one load per model, even with concurrent callers
+                model = self._models.get(name)
+                if model is None:
+                    print(f"⏳ Chargement du modèle {name}...")
+                    model = self._models[name] = self._loaders[name]()
+        return model
+
+    def warmup(self, names=None):
+        """Load the models and run their warm-up inference"""
+        for name in names or list(self._loaders):
+            model = self.get(name)
+            if name in self._warmups:
+                self._warmups[name](model)
+        print("✅ Modèles prêts")
+
+    def warmup_in_background(self, names=None):
+        thread = threading.Thread(target=self.warmup, args=(names,), daemon=True)
+        thread.start()
+        return thread
+
+models = ModelRegistry()
+models.register(
+    "whisper",
+    lambda: whisper.load_model(WHISPER_MODEL),
+    # One second of silence at Whisper's 16 kHz sample rate
+    lambda model: model.transcribe(np.zeros(16000, dtype=np.float32), language='fr', fp16=USE_CUDA)
+)
+models.register(
+    "summarizer",
+    lambda: pipeline(
+        "summarization",
+        model=SUMMARY_MODEL,
+        tokenizer=SUMMARY_MODEL,
+        device=0 if USE_CUDA else -1
+    ),
+    lambda summarizer: summarizer("Bonjour, merci d'être venu.", max_length=10, min_length=2)
+)
+
 # 🔧 Nettoyage du texte renforcé
 def clean_text(text):
     replacements = {
@@ -40,8 +104,8 @@ def transcribe_audio(file):
     
     try:
         print("\n🔄 Transcription en cours...")
-        model = whisper.load_model("base" if torch.cuda.is_available() else "tiny")
-        result = model.transcribe(file, language='fr', fp16=torch.cuda.is_available())
+        model = models.get("whisper")
+        result = model.transcribe(file, language='fr', fp16=USE_CUDA)
         return clean_text(result['text'])
     except Exception as e:
         print(f"❌ Échec de la transcription : {str(e)}")
@@ -74,7 +138,64 @@ def format_dialogue(text):
     return "\n".join(lines)
 
 # ✂️ Résumé avec BARTHEZ configuré
+# Tokens per chunk: below BARThez's 1024-token window, leaving room for special tokens
+SUMMARY_CHUNK_TOKENS = int(os.getenv("SUMMARY_CHUNK_TOKENS", 900))
+SUMMARY_BATCH_SIZE = int(os.getenv("SUMMARY_BATCH_SIZE", 4))
+
+def chunk_turns(turns, tokenizer, max_tokens=SUMMARY_CHUNK_TOKENS):
+    """Group dialogue turns into chunks of at most max_tokens tokens.
+
+    Chunks only break between turns; a single turn longer than max_tokens
+    is split on word boundaries into pieces of roughly max_tokens tokens.
+    """
+    counts = tokenizer(turns, add_special_tokens=False)["input_ids"]
+    chunks, current, size = [], [], 0
+    for turn, ids in zip(turns, counts):
+        pieces = [(turn, len(ids))]
+        if len(ids) > max_tokens:
+            words = turn.split()
+            step = max(1, len(words) * max_tokens // len(ids))
+            pieces = [
+                (' '.join(words[i:i + step]), -(-len(words[i:i + step]) * len(ids) // len(words)))
+                for i in range(0, len(words), step)
+            ]
+        for piece, tokens in pieces:
+            if current and size + tokens > max_tokens:
+                chunks.append("\n".join(current))
+                current, size = [], 0
+            current.append(piece)
+            size += tokens
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+def summarize_texts(summarizer, texts):
+    """Summaries of texts, computed in batched pipeline calls"""
+    # Ajustement automatique de la longueur, sur le plus long texte du lot
+    input_length = max(len(text.split()) for text in texts)
+    max_len = min(200, max(50, input_length//2))
+    min_len = min(30, max_len//2)
+
+    results = summarizer(
+        texts,
+        batch_size=SUMMARY_BATCH_SIZE,
+        max_length=max_len,
+        min_length=min_len,
+        num_beams=4,
+        early_stopping=False,
+        no_repeat_ngram_size=3,
+        truncation=True  # only a safety net, chunks already fit
+    )
+    return [result['summary_text'] for result in results]
+
 def generate_summary(text):
+    """Map-reduce summary of a dialogue of any length.
+
+    The turns are grouped into chunks that fit the model window and the
+    chunks are summarized in batches (map). The chunk summaries are then
+    summarized together (reduce), chunked again while they do not fit in
+    one window, so nothing is truncated and each pass is linear in length.
+    """
     if not text:
         return "Aucun contenu à résumer"
     
@@ -82,27 +203,22 @@ def generate_summary(text):
         print("\n🧠 Génération du résumé...")
         set_seed(42)  # Pour la reproductibilité
         
-        summarizer = pipeline(
-            "summarization",
-            model="moussaKam/barthez-orangesum-title",
-            tokenizer="moussaKam/barthez-orangesum-title",
-            device=0 if torch.cuda.is_available() else -1
-        )
-        
-        # Ajustement automatique de la longueur
-        input_length = len(text.split())
-        max_len = min(200, max(50, input_length//2))
-        min_len = min(30, max_len//2)
-        
-        summary = summarizer(
-            text,
-            max_length=max_len,
-            min_length=min_len,
-            num_beams=4,
-            early_stopping=False,
-            no_repeat_ngram_size=3,
-            truncation=True
-        )[0]['summary_text']
+        summarizer = models.get("summarizer")
+
+        turns = [line for line in text.split('\n') if line.strip()]
+        chunks = chunk_turns(turns, summarizer.tokenizer)
+        if not chunks:
+            return "Aucun contenu à résumer"
+        while len(chunks) > 1:
+            print(f"🧩 Résumé de {len(chunks)} segments...")
+            summaries = summarize_texts(summarizer, chunks)
+            reduced = chunk_turns(summaries, summarizer.tokenizer)
+            if len(reduced) >= len(chunks):
+                chunks = ["\n".join(summaries)]  # summaries stopped shrinking, truncate the last pass
+                break
+            chunks = reduced
+
+        summary = summarize_texts(summarizer, chunks)[0]
         
         return "• " + clean_text(summary).replace('. ', '\n• ')
     except Exception as e:
@@ -168,6 +284,26 @@ def create_pdf_report(content, summary, filename, candidate):
         print(f"❌ Échec de génération PDF : {str(e)}")
         return False
 
+# 🔁 Traitement réutilisable d'un entretien enregistré (modèles partagés)
+def process_interview(audio_file, candidate, base_name):
+    transcript = transcribe_audio(audio_file)
+    if not transcript:
+        return None
+
+    with open(f"{base_name}_transcription.txt", "w", encoding='utf-8') as f:
+        f.write(transcript)
+
+    dialogue = format_dialogue(transcript)
+    summary = generate_summary(dialogue)
+
+    if not create_pdf_report(dialogue, summary, f"{base_name}.pdf", candidate):
+        return None
+    return {
+        "audio": audio_file,
+        "transcription": f"{base_name}_transcription.txt",
+        "report": f"{base_name}.pdf"
+    }
+
 def main():
     print("\n" + "="*50)
     print("  SYSTÈME D'ANALYSE D'ENTRETIEN")
@@ -176,29 +312,22 @@ def main():
     candidate = input("\nNom du candidat : ").strip().title() or "Candidat"
     base_name = f"Entretien_{candidate.replace(' ', '_')}_{datetime.now().strftime('%Y%m%d_%H%M')}"
     
+    # Les modèles se chargent pendant l'enregistrement
+    warmup = models.warmup_in_background()
+
     # 1. Enregistrement audio
     if not record_audio(f"{base_name}.wav"):
         return
-    
-    # 2. Transcription
-    transcript = transcribe_audio(f"{base_name}.wav")
-    if not transcript:
-        return
-    
-    with open(f"{base_name}_transcription.txt", "w", encoding='utf-8') as f:
-        f.write(transcript)
-    
-    # 3. Analyse
-    dialogue = format_dialogue(transcript)
-    summary = generate_summary(dialogue)
-    
-    # 4. Génération du rapport
-    if create_pdf_report(dialogue, summary, f"{base_name}.pdf", candidate):
+    warmup.join()
+
+    # 2-4. Transcription, analyse et rapport
+    outputs = process_interview(f"{base_name}.wav", candidate, base_name)
+    if outputs:
         print("\n" + "="*50)
         print("  RÉSULTATS FINAUX")
-        print(f"• Audio : {base_name}.wav")
-        print(f"• Transcription : {base_name}_transcription.txt")
-        print(f"• Rapport : {base_name}.pdf")
+        print(f"• Audio : {outputs['audio']}")
+        print(f"• Transcription : {outputs['transcription']}")
+        print(f"• Rapport : {outputs['report']}")
         print("="*50 + "\n")
 
 if __name__ == "__main__":
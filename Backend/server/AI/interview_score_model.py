@@ -1,58 +1,67 @@
 from flask import Flask, request, jsonify
+import os
 import pickle
+import numpy as np
 import pandas as pd
 from flask_cors import CORS
+from metrics import init_metrics, time_inference
 
 app = Flask(__name__)
 CORS(app)
+init_metrics(app, "interview_score")
 
-# Load the trained model
-with open('interview_score_model.pkl', 'rb') as f:
+# Load the trained model, next to this file whatever the working directory
+MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'interview_score_model.pkl')
+with open(MODEL_PATH, 'rb') as f:
     model = pickle.load(f)
 
-@app.route('/predict', methods=['POST'])
-def predict():
-    data = request.json
+# Model feature -> request field it is read from
+FEATURE_SOURCES = {
+    'domain_x': 'domain_match',
+    'experience_years': 'experience_years',
+    'education': 'education_match',  # Adjust if needed
+    'location_x': 'location',
+    'exp_match': 'experience_match',
+    'skill_match': 'skill_match',
+    'education_match': 'education_match'
+}
 
-    # Ensure the input data includes all required features
-    df = pd.DataFrame([{
-        'domain_x': data.get('domain_match', 0),
-        'experience_years': data.get('experience_years', 0),
-        'education': data.get('education_match', 0),  # Adjust if needed
-        'location_x': data.get('location', 0),
-        'exp_match': data.get('experience_match', 0),
-        'skill_match': data.get('skill_match', 0),  # Added this field
-        'education_match': data.get('education_match', 0)  # Added this field
-    }])
+# Column order the model was fitted with
+FEATURE_COLUMNS = list(getattr(model, 'feature_names_in_', FEATURE_SOURCES))
 
-    # Print the dataframe to verify it's correctly structured
-    print(f"Input DataFrame: {df}")
+def build_features(items):
+    """Integer feature matrix in model column order, validated in one pass.
 
-    # Handle missing values more explicitly
-    df.fillna(0, inplace=True)  # Replace NaN values with 0 (or another suitable value)
+    Missing or null fields count as 0; anything non-numeric raises ValueError.
+    """
+    sources = [FEATURE_SOURCES[column] for column in FEATURE_COLUMNS]
+    matrix = np.array([[item.get(source, 0) for source in sources] for item in items], dtype=float)
+    matrix = np.nan_to_num(matrix, nan=0.0, posinf=np.inf, neginf=-np.inf)
+    if not np.isfinite(matrix).all():
+        raise ValueError('Data contains infinite values')
+    return matrix.astype(np.int64)
 
-    # Ensure that all columns are of the correct type
-    df['domain_x'] = df['domain_x'].astype(int)
-    df['experience_years'] = df['experience_years'].astype(int)
-    df['education'] = df['education'].astype(int)
-    df['location_x'] = df['location_x'].astype(int)
-    df['exp_match'] = df['exp_match'].astype(int)
-    df['skill_match'] = df['skill_match'].astype(int)
-    df['education_match'] = df['education_match'].astype(int)
+def predict_scores(features):
+    """Interview scores clipped to [0, 1]"""
+    if hasattr(model, 'feature_names_in_'):
+        # Fitted on a DataFrame: one constructor call keeps feature-name checks quiet
+        features = pd.DataFrame(features, columns=FEATURE_COLUMNS, copy=False)
+    with time_inference("interview_score_model"):
+        predictions = model.predict(features)
+    return np.clip(np.asarray(predictions, dtype=float), 0, 1)
 
-    # Print the cleaned dataframe for debugging
-    print(f"Cleaned DataFrame: {df}")
+@app.route('/predict', methods=['POST'])
+def predict():
+    data = request.json
 
-    # Check if there are any NaN values after processing
-    if df.isna().sum().sum() > 0:
-        return jsonify({'error': 'Data contains NaN values after processing'}), 400
+    try:
+        features = build_features([data])
+    except (AttributeError, TypeError, ValueError) as e:
+        return jsonify({'error': 'Invalid input data', 'message': str(e)}), 400
 
     try:
         # Make prediction
-        prediction = model.predict(df)
-
-        # Ensure score is between 0 and 1
-        score = max(0, min(1, float(prediction[0])))
+        score = float(predict_scores(features)[0])
 
         return jsonify({'interview_score': score})
     except Exception as e:
@@ -60,5 +69,24 @@ def predict():
         print(f"Error during prediction: {str(e)}")
         return jsonify({'error': 'Prediction failed', 'message': str(e)}), 500
 
+@app.route('/predict/batch', methods=['POST'])
+def predict_batch():
+    data = request.json
+    items = data.get('items') if isinstance(data, dict) else None
+    if not isinstance(items, list) or not items:
+        return jsonify({'error': 'items must be a non-empty list'}), 400
+
+    try:
+        features = build_features(items)
+    except (AttributeError, TypeError, ValueError) as e:
+        return jsonify({'error': 'Invalid input data', 'message': str(e)}), 400
+
+    try:
+        scores = predict_scores(features)
+        return jsonify({'interview_scores': scores.tolist()})
+    except Exception as e:
+        print(f"Error during batch prediction: {str(e)}")
+        return jsonify({'error': 'Prediction failed', 'message': str(e)}), 500
+
 if __name__ == '__main__':
     app.run(port=7000)
@@ -1,24 +1,224 @@
 import os
-from pymongo import MongoClient
+import logging
+from contextlib import contextmanager
 from sentence_transformers import SentenceTransformer
 import numpy as np
-from faiss import IndexFlatIP
+import faiss
+import hashlib
+import threading
 import time
 from bson import ObjectId
-from typing import List, Dict, Any, Optional, Union
+from collections import defaultdict
+from typing import List, Dict, Any, Iterator, Optional, Set, Union
+from data_access import get_db
+from embedding_store import EmbeddingStore
+from index_factory import MIN_POINTS_PER_CELL, IndexConfig, build_index, search_parameters
+from metrics import INFERENCE_LATENCY, JOB_INDEX_AGE, JOB_INDEX_SIZE, MONGO_LATENCY
 
-# Initialize MongoDB connection
-client = MongoClient(os.getenv("MONGO_URI"))
-db = client[os.getenv("MONGO_DB_NAME", "users")]
+logger = logging.getLogger(__name__)
 
 # Load the embedding model
-model = SentenceTransformer('all-MiniLM-L6-v2')
+MODEL_NAME = 'all-MiniLM-L6-v2'
+model = SentenceTransformer(MODEL_NAME)
+
+# Embeddings persist here across restarts, keyed by document _id and text hash
+EMBEDDING_STORE_DIR = os.getenv(
+    "EMBEDDING_STORE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "embeddings")
+)
+
+# Job fields that feed _prepare_job_text and the recommendation payload
+JOB_FIELDS = {
+    "title": 1,
+    "description": 1,
+    "skills": 1,
+    "languages": 1,
+    "location": 1,
+    "salary": 1,
+    "entrepriseId": 1,
+    "createdAt": 1
+}
+
+# Candidate fields that feed _prepare_candidate_text and applied-job filtering
+CANDIDATE_FIELDS = {"profile": 1, "applications": 1, "name": 1}
+
+# Structured filters accepted by recommend_jobs / recommend_jobs_batch
+FILTER_KEYS = {"locations", "languages", "min_salary", "max_salary"}
+
+# Candidates handled per Mongo query / encode call / index search in batch mode
+BATCH_SIZE = 256
+
+# Seconds between index refreshes (inline TTL, or background refresher timer)
+REFRESH_INTERVAL = int(os.getenv("JOB_INDEX_REFRESH_SECONDS", 3600))
+
+# Refresh on MongoDB change stream events instead of the timer (needs a replica set)
+USE_CHANGE_STREAM = os.getenv("JOB_INDEX_CHANGE_STREAM", "false").lower() in ("1", "true", "yes")
+
+# Quiet period that groups bursts of change stream events into one refresh
+CHANGE_STREAM_DEBOUNCE = 5
+
+# Seconds between updates of the index age gauge by the background refresher
+AGE_REPORT_INTERVAL = 15
+
+# An IVF index trained on too few jobs for its configured nlist is retrained
+# once the catalog has grown by this factor since it was trained
+RETRAIN_GROWTH = 2
+
+# HNSW cannot remove vectors: stale ones stay in the graph, masked from
+# searches, until they exceed this fraction of the live jobs
+HNSW_MAX_STALE_FRACTION = float(os.getenv("JOB_INDEX_HNSW_MAX_STALE", 0.2))
+
+@contextmanager
+def _stage(name: str, metric=None, **fields):
+    """Time a pipeline stage, observe it on metric and log it as structured fields.
+
+    Timing is skipped entirely when there is no metric and DEBUG is disabled
+    for this logger; the log record carries ``stage``, ``duration_ms`` and
+    any extra fields so JSON formatters can pick them up without parsing the
+    message.
+    """
+    debug = logger.isEnabledFor(logging.DEBUG)
+    if metric is None and not debug:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - start
+        if metric is not None:
+            metric.observe(duration)
+        if debug:
+            logger.debug("stage %s took %.2f ms", name, duration * 1000,
+                         extra={"stage": name, "duration_ms": duration * 1000, **fields})
+
+class JobIndexSnapshot:
+    """The job index together with the bookkeeping needed to query it.
+
+    A snapshot is never modified once published by JobRecommender: refreshes
+    work on a copy and swap the reference, so a request that grabbed a
+    snapshot sees a consistent index, id maps and metadata throughout.
+    """
 
-class JobRecommender:
     def __init__(self):
-        self.job_index: Optional[IndexFlatIP] = None
-        self.job_ids: List[ObjectId] = []
-        self.last_update: float = 0
+        self.index: Optional[faiss.Index] = None  # see build_index
+        self.job_ids: Dict[int, ObjectId] = {}  # FAISS id -> job _id
+        self.faiss_ids: Dict[ObjectId, int] = {}  # job _id -> FAISS id
+        self.job_hashes: Dict[ObjectId, str] = {}  # job _id -> text hash
+        self.job_meta: Dict[ObjectId, Dict[str, Any]] = {}  # job _id -> serialized job
+        self.filter_columns: Dict[str, Any] = {
+            "ids": np.empty(0, dtype='int64'),
+            "location": np.empty(0, dtype=str),
+            "salary": np.empty(0, dtype='float64'),
+            "languages": {}
+        }
+        self.next_faiss_id: int = 0
+        self.trained_size: int = 0  # vectors the index was built (and trained) from
+        self.masked_ids = np.empty(0, dtype='int64')  # stale vectors left in an HNSW graph
+        self.built_at: float = 0
+
+    def copy(self, clone_index: bool) -> "JobIndexSnapshot":
+        """Copy for the next refresh; the FAISS index is shared unless cloned"""
+        snapshot = JobIndexSnapshot()
+        if self.index is not None:
+            snapshot.index = faiss.clone_index(self.index) if clone_index else self.index
+        snapshot.job_ids = dict(self.job_ids)
+        snapshot.faiss_ids = dict(self.faiss_ids)
+        snapshot.job_hashes = dict(self.job_hashes)
+        snapshot.next_faiss_id = self.next_faiss_id
+        snapshot.trained_size = self.trained_size
+        snapshot.masked_ids = self.masked_ids
+        return snapshot
+
+    def build_filter_columns(self) -> None:
+        """Column arrays over the indexed jobs, used to evaluate search filters"""
+        faiss_ids = np.fromiter(self.job_ids.keys(), dtype='int64', count=len(self.job_ids))
+        jobs = [self.job_meta.get(self.job_ids[int(faiss_id)], {}) for faiss_id in faiss_ids]
+        
+        salaries = []
+        languages = defaultdict(list)
+        for faiss_id, job in zip(faiss_ids, jobs):
+            try:
+                salaries.append(float(job.get('salary')))
+            except (TypeError, ValueError):
+                salaries.append(np.nan)
+            for language in job.get('languages') or []:
+                languages[str(language).strip().lower()].append(faiss_id)
+        
+        self.filter_columns = {
+            "ids": faiss_ids,
+            "location": np.array([str(job.get('location') or '').strip().lower() for job in jobs], dtype=str),
+            "salary": np.array(salaries, dtype='float64'),
+            "languages": {language: np.array(ids, dtype='int64') for language, ids in languages.items()}
+        }
+
+    def filter_ids(self, filters: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """FAISS ids of the jobs matching filters, or None when unfiltered.
+
+        ``locations`` and ``languages`` match case-insensitively (a job needs
+        one of the given languages); ``min_salary``/``max_salary`` bound the
+        job salary and exclude jobs without one.
+        """
+        if not filters:
+            return None
+        unknown = set(filters) - FILTER_KEYS
+        if unknown:
+            raise ValueError(f"Unknown filters: {', '.join(sorted(unknown))}")
+        
+        columns = self.filter_columns
+        mask = np.ones(len(columns["ids"]), dtype=bool)
+        
+        locations = filters.get("locations")
+        if locations:
+            if isinstance(locations, str):
+                locations = [locations]
+            mask &= np.isin(columns["location"], [str(l).strip().lower() for l in locations])
+        
+        languages = filters.get("languages")
+        if languages:
+            if isinstance(languages, str):
+                languages = [languages]
+            matching = [columns["languages"].get(str(l).strip().lower()) for l in languages]
+            matching = [ids for ids in matching if ids is not None]
+            mask &= np.isin(columns["ids"], np.concatenate(matching) if matching else [])
+        
+        if filters.get("min_salary") is not None:
+            mask &= columns["salary"] >= float(filters["min_salary"])
+        if filters.get("max_salary") is not None:
+            mask &= columns["salary"] <= float(filters["max_salary"])
+        
+        return columns["ids"][mask]
+
+    def applied_faiss_ids(self, applied_job_ids: Set[ObjectId]) -> List[int]:
+        return [self.faiss_ids[job_id] for job_id in applied_job_ids if job_id in self.faiss_ids]
+
+class JobRecommender:
+    def __init__(self, index_config: Optional[IndexConfig] = None):
+        self.index_config = index_config or IndexConfig.from_env()
+        self._snapshot = JobIndexSnapshot()
+        self._refresh_lock = threading.Lock()
+        self._refresher: Optional[threading.Thread] = None
+        self._stop_refresh = threading.Event()
+        
+        dimension = model.get_sentence_embedding_dimension()
+        self.job_store = EmbeddingStore(EMBEDDING_STORE_DIR, f"jobs-{MODEL_NAME}", dimension)
+        self.candidate_store = EmbeddingStore(EMBEDDING_STORE_DIR, f"candidates-{MODEL_NAME}", dimension)
+    
+    @property
+    def job_index(self) -> Optional[faiss.Index]:
+        return self._snapshot.index
+    
+    @property
+    def job_ids(self) -> Dict[int, ObjectId]:
+        return self._snapshot.job_ids
+    
+    @property
+    def job_meta(self) -> Dict[ObjectId, Dict[str, Any]]:
+        return self._snapshot.job_meta
+    
+    @property
+    def last_update(self) -> float:
+        return self._snapshot.built_at
         
     def _prepare_job_text(self, job: Dict[str, Any]) -> str:
         """Enhanced job text preparation with null checks"""
@@ -60,199 +260,518 @@ class JobRecommender:
         
         return '\n'.join(filter(None, components))
     
-    def update_job_index(self, force: bool = False) -> None:
-        """Update the job index with all available jobs"""
-        if not force and time.time() - self.last_update < 3600:  # 1 hour cache
+    @staticmethod
+    def _text_hash(text: str) -> str:
+        """Content hash used to detect jobs whose indexed text changed"""
+        return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _encode(texts: List[str]) -> np.ndarray:
+        """Encode texts into L2-normalised float32 embeddings"""
+        embeddings = model.encode(texts, convert_to_tensor=False)
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return (embeddings / np.clip(norms, 1e-8, None)).astype('float32')
+
+    def _embed(
+        self,
+        store: EmbeddingStore,
+        keys: List[str],
+        texts: List[str],
+        text_hashes: Optional[List[str]] = None
+    ) -> np.ndarray:
+        """Embed texts, reusing vectors from store and persisting new ones"""
+        if text_hashes is None:
+            text_hashes = [self._text_hash(text) for text in texts]
+        
+        cached = store.get_many(keys, text_hashes)
+        missing = [i for i in range(len(texts)) if i not in cached]
+        
+        embeddings = np.empty((len(texts), store.dimension), dtype='float32')
+        for i, vector in cached.items():
+            embeddings[i] = vector
+        
+        if missing:
+            with _stage("encode", INFERENCE_LATENCY.labels(model=MODEL_NAME), texts=len(missing)):
+                encoded = self._encode([texts[i] for i in missing])
+            embeddings[missing] = encoded
+            store.put_many([keys[i] for i in missing], [text_hashes[i] for i in missing], encoded)
+        
+        return embeddings
+
+    @staticmethod
+    def _serialize_job(job: Dict[str, Any]) -> Dict[str, Any]:
+        """Projected job document in its JSON response form"""
+        job = {field: job[field] for field in ("_id", *JOB_FIELDS) if field in job}
+        job["_id"] = str(job["_id"])
+        if "entrepriseId" in job:
+            job["entrepriseId"] = str(job["entrepriseId"])
+        return job
+
+    def update_job_index(self, force: bool = False, full: bool = False) -> None:
+        """Refresh the job index, embedding only new or changed jobs.
+
+        Each indexed job is tracked by a hash of its prepared text; jobs whose
+        hash is unchanged keep their vectors, changed jobs are re-embedded and
+        jobs removed from the database are dropped from the index. Index types
+        that cannot remove vectors (HNSW) keep stale vectors in the graph,
+        masked from searches, and are rebuilt from the embedding store only
+        once those exceed HNSW_MAX_STALE_FRACTION of the jobs, so a refresh
+        stays proportional to what changed. An IVF index trained on a small
+        catalog is retrained once the catalog has grown RETRAIN_GROWTH times.
+        The projected job documents served by recommend_jobs are refreshed
+        from the same query. Pass ``full=True`` to rebuild (and retrain) the
+        index from scratch.
+
+        The refresh works on a copy of the current snapshot and swaps it in
+        only once complete; if it fails, the last good index stays live.
+        """
+        if not force and time.time() - self.last_update < REFRESH_INTERVAL:
             return
         
-        try:
-            jobs = list(db.jobs.find())
-            print(f"\n[DEBUG] Found {len(jobs)} jobs in database")
-            
-            if not jobs:
-                print("[WARNING] No jobs found in database")
-                return
-            
-            job_texts = []
-            self.job_ids = []
-            
-            for i, job in enumerate(jobs, 1):
+        with self._refresh_lock:
+            if not force and time.time() - self.last_update < REFRESH_INTERVAL:
+                return  # refreshed by another thread while we waited
+            try:
+                self._snapshot = self._build_snapshot(self._snapshot, full)
+            except Exception as e:
+                logger.exception("Updating job index failed, keeping the previous one: %s", e)
+            # Set rather than read back at scrape time, so the values survive
+            # aggregation in Prometheus multiprocess mode
+            JOB_INDEX_SIZE.set(len(self._snapshot.job_ids))
+            self._report_index_age()
+    
+    def _report_index_age(self) -> None:
+        if self.last_update:
+            JOB_INDEX_AGE.set(time.time() - self.last_update)
+    
+    def _build_snapshot(self, current: JobIndexSnapshot, full: bool) -> JobIndexSnapshot:
+        """Build the next snapshot from current and the jobs collection"""
+        job_meta = {}
+        job_texts = {}
+        job_hashes = {}
+        
+        with _stage("mongo_fetch", MONGO_LATENCY.labels(collection="jobs", operation="find"), collection="jobs"):
+            # Full scans are analytics reads and may be served by a secondary
+            for job in get_db(analytics=True).jobs.find({}, JOB_FIELDS):
                 job_text = self._prepare_job_text(job)
-                print(f"\n[DEBUG] Job {i}/{len(jobs)}:")
-                print(f"ID: {job['_id']}")
-                print(f"Title: {job.get('title', 'N/A')}")
-                print(f"Text: {job_text[:200]}...")  # Print first 200 chars
+                if not job_text.strip():
+                    logger.warning("Skipped empty job text for job %s", job['_id'])
+                    continue
                 
-                if job_text.strip():
-                    job_texts.append(job_text)
-                    self.job_ids.append(job["_id"])
-                else:
-                    print("[WARNING] Skipped empty job text")
-            
-            if not job_texts:
-                print("[ERROR] No valid jobs found to index")
-                return
-            
-            # Generate embeddings and normalize
-            print("\n[DEBUG] Generating embeddings...")
-            embeddings = model.encode(job_texts, convert_to_tensor=False)
-            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
-            embeddings = embeddings / np.clip(norms, 1e-8, None)
-            
-            # Create or update FAISS index
-            dimension = embeddings.shape[1]
-            self.job_index = IndexFlatIP(dimension)
-            self.job_index.add(embeddings.astype('float32'))
+                job_id = job["_id"]
+                job_meta[job_id] = self._serialize_job(job)
+                job_texts[job_id] = job_text
+                job_hashes[job_id] = self._text_hash(job_text)
+        
+        logger.debug("Found %d jobs in database", len(job_texts))
+        
+        if not job_texts:
+            logger.warning("No jobs found in database")
+            snapshot = JobIndexSnapshot()
+            snapshot.built_at = time.time()
+            return snapshot
+        
+        changed = [job_id for job_id, text_hash in job_hashes.items()
+                   if current.job_hashes.get(job_id) != text_hash]
+        deleted = [job_id for job_id in current.faiss_ids if job_id not in job_hashes]
+        stale = deleted + [job_id for job_id in changed if job_id in current.faiss_ids]
+        
+        masked = len(current.masked_ids) + (0 if self.index_config.supports_removal else len(stale))
+        retrain = self._needs_retrain(current, len(job_hashes))
+        if retrain:
+            logger.info("Retraining %s index: trained on %d jobs, catalog now has %d",
+                        self.index_config.index_type, current.trained_size, len(job_hashes))
+        rebuild = full or current.index is None or retrain or masked > HNSW_MAX_STALE_FRACTION * len(job_hashes)
+        if rebuild:
+            snapshot = JobIndexSnapshot()
+            snapshot.next_faiss_id = current.next_faiss_id
+            changed = list(job_hashes)
+        else:
+            # Live searches must never see a half-updated index
+            snapshot = current.copy(clone_index=bool(stale or changed))
+        
+        if stale and snapshot.index is not None:
+            # Remove deleted jobs and the stale vectors of changed jobs
+            faiss_ids = np.array([snapshot.faiss_ids.pop(job_id) for job_id in stale], dtype='int64')
+            if self.index_config.supports_removal:
+                snapshot.index.remove_ids(faiss_ids)
+            else:
+                snapshot.masked_ids = np.concatenate([snapshot.masked_ids, faiss_ids])
+            for faiss_id, job_id in zip(faiss_ids, stale):
+                del snapshot.job_ids[int(faiss_id)]
+                snapshot.job_hashes.pop(job_id, None)
+        
+        if changed:
+            logger.debug("Embedding %d new or changed jobs", len(changed))
+            embeddings = self._embed(
+                self.job_store,
+                [str(job_id) for job_id in changed],
+                [job_texts[job_id] for job_id in changed],
+                [job_hashes[job_id] for job_id in changed]
+            )
             
-            self.last_update = time.time()
-            print(f"[SUCCESS] Indexed {len(self.job_ids)} jobs")
+            faiss_ids = np.arange(snapshot.next_faiss_id, snapshot.next_faiss_id + len(changed), dtype='int64')
+            snapshot.next_faiss_id += len(changed)
+            with _stage("index_add", vectors=len(changed)):
+                if snapshot.index is None:
+                    snapshot.index = build_index(self.index_config, embeddings)
+                    snapshot.trained_size = len(embeddings)
+                snapshot.index.add_with_ids(embeddings, faiss_ids)
             
-        except Exception as e:
-            print(f"[ERROR] Updating job index: {str(e)}")
-            self.job_index = None
-            self.job_ids = []
+            for faiss_id, job_id in zip(faiss_ids, changed):
+                snapshot.job_ids[int(faiss_id)] = job_id
+                snapshot.faiss_ids[job_id] = int(faiss_id)
+                snapshot.job_hashes[job_id] = job_hashes[job_id]
+        
+        snapshot.job_meta = job_meta
+        snapshot.build_filter_columns()
+        
+        if deleted:
+            self.job_store.discard(str(job_id) for job_id in deleted)
+        # Candidate rows are superseded on every profile edit, so both stores
+        # are compacted here, off the request path
+        for store in (self.job_store, self.candidate_store):
+            if store.dead_rows > len(store):
+                store.compact()
+        
+        snapshot.built_at = time.time()
+        logger.info("Indexed %d jobs with %s index (%d added, %d removed)",
+                    len(snapshot.job_ids), self.index_config.index_type, len(changed), len(stale))
+        return snapshot
+    
+    def start_background_refresh(self, use_change_stream: bool = USE_CHANGE_STREAM) -> None:
+        """Build the index and keep it fresh from a daemon thread.
+
+        The thread refreshes every REFRESH_INTERVAL seconds, or on changes to
+        the jobs collection when use_change_stream is set, so requests no
+        longer pay for refreshes. The first build also runs in the thread, so
+        startup is not blocked; until it completes, requests find no jobs.
+        """
+        if self._refresher is not None and self._refresher.is_alive():
+            return  # a refresher started before a fork is not running in the child
+        
+        self._stop_refresh.clear()
+        self._refresher = threading.Thread(
+            target=self._refresh_loop,
+            args=(use_change_stream,),
+            name="job-index-refresher",
+            daemon=True
+        )
+        self._refresher.start()
+    
+    def stop_background_refresh(self) -> None:
+        if self._refresher is None:
+            return
+        self._stop_refresh.set()
+        self._refresher.join()
+        self._refresher = None
+    
+    def _refresh_loop(self, use_change_stream: bool) -> None:
+        self.update_job_index(force=True)
+        if use_change_stream:
+            try:
+                self._watch_jobs()
+                return
+            except Exception as e:
+                logger.warning("Job change stream unavailable, refreshing every %ds: %s", REFRESH_INTERVAL, e)
+        
+        # Wake up often enough to keep the age gauge current between refreshes
+        while not self._stop_refresh.wait(min(AGE_REPORT_INTERVAL, REFRESH_INTERVAL)):
+            if time.time() - self.last_update >= REFRESH_INTERVAL:
+                self.update_job_index(force=True)
+            else:
+                self._report_index_age()
+    
+    def _refresh_if_stale(self) -> None:
+        """Inline TTL refresh, unless the background refresher owns refreshes"""
+        if self._refresher is None:
+            self.update_job_index()
+    
+    def _watch_jobs(self) -> None:
+        """Refresh whenever the jobs collection changes, batching bursts of edits"""
+        with get_db().jobs.watch(max_await_time_ms=1000) as stream:
+            while not self._stop_refresh.is_set():
+                if stream.try_next() is None:
+                    self._report_index_age()  # polled about once a second
+                    continue
+                # Drain further events until the collection is quiet
+                quiet_since = time.time()
+                while time.time() - quiet_since < CHANGE_STREAM_DEBOUNCE and not self._stop_refresh.is_set():
+                    if stream.try_next() is not None:
+                        quiet_since = time.time()
+                self.update_job_index(force=True)
+    
+    def _needs_retrain(self, snapshot: JobIndexSnapshot, jobs: int) -> bool:
+        """True when an IVF index was trained with a reduced nlist and the catalog has since grown"""
+        if not self.index_config.index_type.startswith("ivf") or snapshot.index is None:
+            return False
+        undertrained = snapshot.trained_size < self.index_config.nlist * MIN_POINTS_PER_CELL
+        return undertrained and jobs >= RETRAIN_GROWTH * max(snapshot.trained_size, 1)
+
+    @staticmethod
+    def _id_selector(ids) -> faiss.IDSelectorBatch:
+        ids = np.ascontiguousarray(ids, dtype='int64')
+        return faiss.IDSelectorBatch(len(ids), faiss.swig_ptr(ids))
+
+    def _search(
+        self,
+        snapshot: JobIndexSnapshot,
+        embeddings: np.ndarray,
+        k: int,
+        allowed_ids: Optional[np.ndarray] = None,
+        excluded_ids: Optional[List[int]] = None
+    ):
+        """Search the index, restricted to allowed_ids and skipping excluded_ids"""
+        if len(snapshot.masked_ids):
+            excluded_ids = np.concatenate([np.asarray(excluded_ids or [], dtype='int64'), snapshot.masked_ids])
+        # Selectors are kept in locals so they outlive the search call
+        allowed = self._id_selector(allowed_ids) if allowed_ids is not None else None
+        excluded_batch = self._id_selector(excluded_ids) if excluded_ids is not None and len(excluded_ids) else None
+        excluded = faiss.IDSelectorNot(excluded_batch) if excluded_batch is not None else None
+        
+        if allowed is not None and excluded is not None:
+            selector = faiss.IDSelectorAnd(allowed, excluded)
+        else:
+            selector = allowed or excluded
+        
+        params = search_parameters(snapshot.index, self.index_config, selector) if selector else None
+        return snapshot.index.search(embeddings.astype('float32'), max(1, k), params=params)
+
+    @staticmethod
+    def _applied_job_ids(candidate: Dict[str, Any]) -> Set[ObjectId]:
+        """IDs of the jobs a candidate already applied to"""
+        applied_job_ids = set()
+        for app in candidate.get('applications', []):
+            try:
+                applied_job_ids.add(ObjectId(app.get('jobId')))
+            except:
+                continue
+        return applied_job_ids
+    
+    def _rank_hits(
+        self,
+        snapshot: JobIndexSnapshot,
+        candidate: Dict[str, Any],
+        scores: np.ndarray,
+        indices: np.ndarray,
+        top_k: int,
+        threshold: float
+    ) -> Dict[str, Any]:
+        """Turn one row of index search results into a recommendation response"""
+        debug = logger.isEnabledFor(logging.DEBUG)
+        applied_job_ids = self._applied_job_ids(candidate)
+        
+        recommendations = []
+        with _stage("hydrate", hits=len(indices)):
+            for idx, score in zip(indices, scores):
+                if idx < 0:
+                    break  # fewer eligible jobs than requested
+                
+                job_id = snapshot.job_ids.get(int(idx))
+                if job_id is None:
+                    logger.warning("Invalid index %s", idx)
+                    continue
+                    
+                if score < threshold:
+                    if debug:
+                        logger.debug("Score %.3f below threshold %s for job %s", score, threshold, job_id)
+                    continue
+                
+                # Already excluded by the search; kept as a safety net
+                if job_id in applied_job_ids:
+                    continue
+                    
+                job = snapshot.job_meta.get(job_id)
+                if job:
+                    recommendations.append(dict(job, match_score=float(score)))
+                    if len(recommendations) >= top_k:
+                        break
+        
+        recommendations.sort(key=lambda x: x["match_score"], reverse=True)
+        
+        if recommendations:
+            if debug:
+                logger.debug("Returning %d recommendations: %s", len(recommendations),
+                             [(job['_id'], round(job['match_score'], 3)) for job in recommendations])
+            return {"recommendations": recommendations}
+        
+        logger.info("No matching jobs found above threshold %s", threshold)
+        return {
+            "message": "No matching jobs found",
+            "debug_info": {
+                "threshold_used": threshold,
+                "top_scores": [float(s) for s, i in zip(scores[:5], indices[:5]) if i >= 0],
+                "candidate_skills": candidate.get('profile', {}).get('skills', []),
+                "total_jobs_considered": len(snapshot.job_ids)
+            }
+        }
     
     def recommend_jobs(
         self,
         candidate_id: str,
         top_k: int = 5,
-        threshold: float = 0.3  # Lowered default threshold
+        threshold: float = 0.3,  # Lowered default threshold
+        filters: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Union[str, List[Dict[str, Any]]]]:
-        """Get job recommendations for a candidate"""
-        print("\n==== STARTING RECOMMENDATION ====")
-        self.update_job_index()
+        """Get job recommendations for a candidate.
+
+        Applied jobs and jobs not matching filters (see filter_ids) are
+        excluded inside the index search, so exactly top_k eligible jobs are
+        retrieved before the score threshold is applied.
+        """
+        self._refresh_if_stale()
         
         try:
             candidate_obj_id = ObjectId(candidate_id)
         except Exception:
-            print("[ERROR] Invalid candidate ID format")
+            logger.warning("Invalid candidate ID format: %r", candidate_id)
             return {"error": "Invalid candidate ID format"}
         
         try:
-            candidate = db.users.find_one(
-                {"_id": candidate_obj_id, "role": "CANDIDATE"},
-                {"profile": 1, "applications": 1, "name": 1}
-            )
+            with _stage("mongo_fetch", MONGO_LATENCY.labels(collection="users", operation="find_one"),
+                        collection="users"):
+                candidate = get_db().users.find_one(
+                    {"_id": candidate_obj_id, "role": "CANDIDATE"},
+                    CANDIDATE_FIELDS
+                )
         except Exception as e:
-            print(f"[ERROR] Database lookup failed: {str(e)}")
+            logger.error("Database lookup failed for candidate %s: %s", candidate_id, e)
             return {"error": f"Database error: {str(e)}"}
         
         if not candidate:
-            print("[ERROR] Candidate not found or not a candidate role")
+            logger.warning("Candidate %s not found or not a candidate role", candidate_id)
             return {"error": "Candidate not found or not a candidate role"}
         
-        print(f"\n[DEBUG] Candidate: {candidate.get('name', 'Unknown')} ({candidate_id})")
-        
-        # Get applied job IDs
-        applied_job_ids = []
-        for app in candidate.get('applications', []):
-            try:
-                applied_job_ids.append(ObjectId(app.get('jobId')))
-            except:
-                continue
-        
-        print(f"[DEBUG] Applied to {len(applied_job_ids)} jobs")
-        
         # Prepare candidate embedding
         try:
             candidate_text = self._prepare_candidate_text(candidate)
-            print("\n[DEBUG] Candidate Profile Text:")
-            print(candidate_text)
-            
-            candidate_embedding = model.encode(candidate_text, convert_to_tensor=False)
-            candidate_embedding = candidate_embedding / np.linalg.norm(candidate_embedding)
-            
-            print(f"\n[DEBUG] Embedding shape: {candidate_embedding.shape}")
-            print(f"Sample embedding values: {candidate_embedding[:5]}...")
+            candidate_embedding = self._embed(self.candidate_store, [candidate_id], [candidate_text])[0]
         except Exception as e:
-            print(f"[ERROR] Processing candidate profile: {str(e)}")
+            logger.exception("Processing candidate profile %s failed", candidate_id)
             return {"error": f"Error processing candidate profile: {str(e)}"}
         
-        if not self.job_index or len(self.job_ids) == 0:
-            print("[ERROR] No jobs available in the index")
+        snapshot = self._snapshot
+        if snapshot.index is None or len(snapshot.job_ids) == 0:
+            logger.error("No jobs available in the index")
             return {"error": "No jobs available in the index"}
         
         try:
-            # Search for similar jobs
-            search_k = min(top_k * 3, len(self.job_ids))
-            print(f"\n[DEBUG] Searching top {search_k} jobs from {len(self.job_ids)} available")
+            allowed_ids = snapshot.filter_ids(filters)
+            excluded_ids = snapshot.applied_faiss_ids(self._applied_job_ids(candidate))
             
-            scores, indices = self.job_index.search(
-                candidate_embedding.reshape(1, -1).astype('float32'),
-                search_k
-            )
+            # Search for similar jobs among the eligible ones
+            search_k = min(top_k, len(snapshot.job_ids))
+            with _stage("search", INFERENCE_LATENCY.labels(model="faiss"), k=search_k, jobs=len(snapshot.job_ids)):
+                scores, indices = self._search(
+                    snapshot, candidate_embedding.reshape(1, -1), search_k, allowed_ids, excluded_ids
+                )
             
-            print(f"[DEBUG] Raw scores: {scores}")
-            print(f"[DEBUG] Raw indices: {indices}")
+            return self._rank_hits(snapshot, candidate, scores[0], indices[0], top_k, threshold)
             
-            recommendations = []
-            for idx, score in zip(indices[0], scores[0]):
-                if idx >= len(self.job_ids):
-                    print(f"[WARNING] Invalid index {idx} >= {len(self.job_ids)}")
-                    continue
-                    
-                if score < threshold:
-                    print(f"[DEBUG] Score {score:.3f} below threshold {threshold} for job {idx}")
-                    continue
-                    
-                job_id = self.job_ids[idx]
-                
-                # Skip already applied jobs
-                if job_id in applied_job_ids:
-                    print(f"[DEBUG] Skipping already applied job {job_id}")
-                    continue
-                    
-                try:
-                    job = db.jobs.find_one(
-                        {"_id": job_id},
-                        {
-                            "title": 1,
-                            "description": 1,
-                            "skills": 1,
-                            "languages": 1,
-                            "location": 1,
-                            "salary": 1,
-                            "entrepriseId": 1,
-                            "createdAt": 1
-                        }
+        except Exception as e:
+            logger.exception("Recommendation search failed for candidate %s", candidate_id)
+            return {"error": f"Error during recommendation search: {str(e)}"}
+    
+    def recommend_jobs_batch(
+        self,
+        candidate_ids: List[str],
+        top_k: int = 5,
+        threshold: float = 0.3,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """Get job recommendations for many candidates, yielding one result each.
+
+        Candidates are processed in chunks of BATCH_SIZE: each chunk is loaded
+        with a single ``$in`` query and its profiles are encoded in one batched
+        call. Candidates sharing the same applied jobs (typically none) are
+        searched together in one matrix query, with those jobs excluded by the
+        search selector, so exactly top_k is fetched per candidate. Results are
+        yielded in input order, tagged with their candidate_id, as soon as a
+        chunk is ranked.
+        """
+        logger.debug("Batch recommendation for %d candidates", len(candidate_ids))
+        self._refresh_if_stale()
+        
+        for start in range(0, len(candidate_ids), BATCH_SIZE):
+            chunk = candidate_ids[start:start + BATCH_SIZE]
+            results = self._recommend_chunk(chunk, top_k, threshold, filters)
+            for candidate_id, result in zip(chunk, results):
+                yield dict(result, candidate_id=candidate_id)
+    
+    def _recommend_chunk(
+        self,
+        candidate_ids: List[str],
+        top_k: int,
+        threshold: float,
+        filters: Optional[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """Recommendation responses for one chunk of recommend_jobs_batch"""
+        obj_ids = {}
+        for candidate_id in candidate_ids:
+            try:
+                obj_ids[candidate_id] = ObjectId(candidate_id)
+            except Exception:
+                continue
+        
+        try:
+            with _stage("mongo_fetch", MONGO_LATENCY.labels(collection="users", operation="find"),
+                        collection="users", candidates=len(obj_ids)):
+                candidates = {
+                    candidate["_id"]: candidate
+                    for candidate in get_db().users.find(
+                        {"_id": {"$in": list(obj_ids.values())}, "role": "CANDIDATE"},
+                        CANDIDATE_FIELDS
                     )
-                    
-                    if job:
-                        job["_id"] = str(job["_id"])
-                        if "entrepriseId" in job:
-                            job["entrepriseId"] = str(job["entrepriseId"])
-                        job["match_score"] = float(score)
-                        recommendations.append(job)
-                        
-                        print(f"[MATCH] Job {job['title']} (ID: {job['_id']}) - Score: {score:.3f}")
-                        
-                        if len(recommendations) >= top_k:
-                            break
-                except Exception as e:
-                    print(f"[ERROR] Processing job {job_id}: {str(e)}")
-                    continue
-            
-            recommendations.sort(key=lambda x: x["match_score"], reverse=True)
-            
-            if recommendations:
-                print(f"\n[SUCCESS] Returning {len(recommendations)} recommendations")
-                return {"recommendations": recommendations}
-            else:
-                print("\n[WARNING] No matching jobs found")
-                return {
-                    "message": "No matching jobs found",
-                    "debug_info": {
-                        "threshold_used": threshold,
-                        "top_scores": [float(s) for s in scores[0][:5]],
-                        "candidate_skills": candidate.get('profile', {}).get('skills', []),
-                        "total_jobs_considered": len(self.job_ids)
-                    }
                 }
-            
         except Exception as e:
-            print(f"[ERROR] During recommendation search: {str(e)}")
-            return {"error": f"Error during recommendation search: {str(e)}"}
+            logger.error("Database lookup failed for batch: %s", e)
+            return [{"error": f"Database error: {str(e)}"}] * len(candidate_ids)
+        
+        snapshot = self._snapshot
+        if snapshot.index is None or len(snapshot.job_ids) == 0:
+            logger.error("No jobs available in the index")
+            return [{"error": "No jobs available in the index"}] * len(candidate_ids)
+        
+        found = [candidate_id for candidate_id, obj_id in obj_ids.items() if obj_id in candidates]
+        rows = {candidate_id: row for row, candidate_id in enumerate(found)}
+        
+        if found:
+            try:
+                texts = [self._prepare_candidate_text(candidates[obj_ids[candidate_id]]) for candidate_id in found]
+                embeddings = self._embed(self.candidate_store, found, texts)
+                
+                allowed_ids = snapshot.filter_ids(filters)
+                groups = defaultdict(list)  # excluded FAISS ids -> rows searched with them
+                for row, candidate_id in enumerate(found):
+                    applied = self._applied_job_ids(candidates[obj_ids[candidate_id]])
+                    groups[tuple(sorted(snapshot.applied_faiss_ids(applied)))].append(row)
+                
+                search_k = max(1, min(top_k, len(snapshot.job_ids)))
+                scores = np.empty((len(found), search_k), dtype='float32')
+                indices = np.empty((len(found), search_k), dtype='int64')
+                with _stage("search", INFERENCE_LATENCY.labels(model="faiss"), k=search_k,
+                            jobs=len(snapshot.job_ids), queries=len(found), groups=len(groups)):
+                    for excluded_ids, group_rows in groups.items():
+                        scores[group_rows], indices[group_rows] = self._search(
+                            snapshot, embeddings[group_rows], search_k, allowed_ids, list(excluded_ids)
+                        )
+            except Exception as e:
+                logger.exception("Batch recommendation search failed")
+                return [{"error": f"Error during recommendation search: {str(e)}"}] * len(candidate_ids)
+        
+        results = []
+        for candidate_id in candidate_ids:
+            if candidate_id not in obj_ids:
+                results.append({"error": "Invalid candidate ID format"})
+            elif candidate_id not in rows:
+                results.append({"error": "Candidate not found or not a candidate role"})
+            else:
+                row = rows[candidate_id]
+                candidate = candidates[obj_ids[candidate_id]]
+                results.append(self._rank_hits(snapshot, candidate, scores[row], indices[row], top_k, threshold))
+        return results
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.DEBUG)
     recommender = JobRecommender()
-    print("Job recommender initialized with debug mode")
\ No newline at end of file
+    logger.info("Job recommender initialized with debug mode")
\ No newline at end of file
@@ -0,0 +1,42 @@
+import re
+from typing import Dict, List, Mapping, Set, Tuple
+
+
+class KeywordMatcher:
+    """Finds many keywords in a text with one precompiled alternation regex.
+
+    Keywords map to labels (several spellings can share one label). Matching
+    is case-insensitive and whole-word: a keyword may not touch a letter,
+    digit or underscore on either side, which also works for keywords that
+    start or end with punctuation such as "c++" or ".net". Longer keywords
+    are tried first, so "react.js" wins over "react" at the same position.
+    """
+
+    def __init__(self, keywords: Mapping[str, str]):
+        self.labels = {keyword.lower(): label for keyword, label in keywords.items() if keyword.strip()}
+        alternation = '|'.join(
+            re.escape(keyword) for keyword in sorted(self.labels, key=len, reverse=True)
+        )
+        # An empty alternation would match everywhere, so fall back to a never-matching pattern
+        self.pattern = re.compile(rf'(?<!\w)(?:{alternation})(?!\w)' if alternation else r'(?!x)x', re.IGNORECASE)
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def finditer(self, text: str):
+        """Yield (label, start, end) for every match, in text order"""
+        for match in self.pattern.finditer(text):
+            label = self.labels.get(match.group(0).lower())
+            if label is not None:
+                yield label, match.start(), match.end()
+
+    def find(self, text: str) -> Set[str]:
+        """Labels of the keywords present in text"""
+        return {label for label, _, _ in self.finditer(text)}
+
+    def matches(self, text: str) -> Dict[str, Dict[str, object]]:
+        """Per label, the match count and the (start, end) span of each match"""
+        found: Dict[str, List[Tuple[int, int]]] = {}
+        for label, start, end in self.finditer(text):
+            found.setdefault(label, []).append((start, end))
+        return {label: {'count': len(spans), 'positions': spans} for label, spans in found.items()}
@@ -0,0 +1,112 @@
+import os
+import time
+from contextlib import contextmanager
+from flask import Response, g, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram,
+    generate_latest, multiprocess
+)
+
+# Shared Prometheus metrics for the Flask AI services. Each app calls
+# init_metrics(app, "<service>") to get per-endpoint request metrics and a
+# /metrics endpoint; model and Mongo timings are recorded with the helpers
+# below. Under gunicorn, set PROMETHEUS_MULTIPROC_DIR to aggregate workers.
+
+REQUEST_LATENCY = Histogram(
+    "ai_request_duration_seconds",
+    "Time spent handling a request",
+    ["service", "endpoint", "method", "status"]
+)
+REQUEST_ERRORS = Counter(
+    "ai_request_errors_total",
+    "Requests that ended with a 5xx response",
+    ["service", "endpoint"]
+)
+INFERENCE_LATENCY = Histogram(
+    "ai_model_inference_seconds",
+    "Time spent running a model",
+    ["model"]
+)
+MONGO_LATENCY = Histogram(
+    "ai_mongo_query_seconds",
+    "Time spent in MongoDB queries, including cursor iteration",
+    ["collection", "operation"]
+)
+JOB_INDEX_SIZE = Gauge(
+    "ai_job_index_size",
+    "Jobs in the JobRecommender index",
+    multiprocess_mode="max"
+)
+JOB_INDEX_AGE = Gauge(
+    "ai_job_index_age_seconds",
+    "Seconds since the JobRecommender index was last refreshed",
+    multiprocess_mode="min"
+)
+
+
+@contextmanager
+def time_inference(model: str):
+    """Record the duration of the wrapped model call"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        INFERENCE_LATENCY.labels(model=model).observe(time.perf_counter() - start)
+
+
+@contextmanager
+def time_mongo(collection: str, operation: str):
+    """Record the duration of the wrapped MongoDB query"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        MONGO_LATENCY.labels(collection=collection, operation=operation).observe(time.perf_counter() - start)
+
+
+def track_job_index(recommender) -> None:
+    """Report the size and age of a JobRecommender index at scrape time.
+
+    JobRecommender also sets both gauges on each refresh, and its background
+    refresher keeps the age current; that is what is reported in multiprocess
+    mode, where callback gauges are not supported.
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        return
+    JOB_INDEX_SIZE.set_function(lambda: len(recommender.job_ids))
+    JOB_INDEX_AGE.set_function(
+        lambda: time.time() - recommender.last_update if recommender.last_update else float("nan")
+    )
+
+
+def metrics_view():
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
+
+
+def init_metrics(app, service: str) -> None:
+    """Record request latency and errors for app and mount /metrics"""
+
+    @app.before_request
+    def _start_request_timer():
+        g.metrics_start = time.perf_counter()
+
+    @app.after_request
+    def _record_request(response):
+        start = g.pop("metrics_start", None)
+        endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+        if start is None or endpoint == "/metrics":
+            return response
+
+        REQUEST_LATENCY.labels(
+            service=service, endpoint=endpoint, method=request.method, status=response.status_code
+        ).observe(time.perf_counter() - start)
+        if response.status_code >= 500:
+            REQUEST_ERRORS.labels(service=service, endpoint=endpoint).inc()
+        return response
+
+    app.add_url_rule("/metrics", "metrics", metrics_view)
@@ -1,23 +1,84 @@
-from flask import Flask, request, jsonify
-from job_recommender import JobRecommender
+from flask import Flask, Response, request, jsonify, stream_with_context
+from job_recommender import FILTER_KEYS, JobRecommender
 from flask_cors import CORS
+from metrics import init_metrics, track_job_index
+import logging
 import os
 
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO").upper(),
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+)
+
 app = Flask(__name__)
 CORS(app)
+init_metrics(app, "recommendation")
 recommender = JobRecommender()
+track_job_index(recommender)
+
+def validate_filters(filters):
+    if filters is None:
+        return None
+    if not isinstance(filters, dict):
+        return "filters must be an object"
+    unknown = set(filters) - FILTER_KEYS
+    if unknown:
+        return f"Unknown filters: {', '.join(sorted(unknown))}"
+    for key in ("locations", "languages"):
+        value = filters.get(key)
+        if value is not None and not isinstance(value, str) and not (
+            isinstance(value, list) and all(isinstance(item, str) for item in value)
+        ):
+            return f"{key} must be a string or a list of strings"
+    for key in ("min_salary", "max_salary"):
+        value = filters.get(key)
+        if value is None:
+            continue
+        if isinstance(value, bool):
+            return f"{key} must be a number"
+        try:
+            float(value)
+        except (TypeError, ValueError):
+            return f"{key} must be a number"
+    return None
 
 @app.route('/recommend', methods=['POST'])
 def recommend():
     data = request.json
     candidate_id = data.get('candidate_id')
     top_k = data.get('top_k', 5)
+    filters = data.get('filters')
     
     if not candidate_id:
         return jsonify({"error": "candidate_id is required"}), 400
     
-    results = recommender.recommend_jobs(candidate_id, top_k)
+    error = validate_filters(filters)
+    if error:
+        return jsonify({"error": error}), 400
+    
+    results = recommender.recommend_jobs(candidate_id, top_k, filters=filters)
     return jsonify(results)
 
+@app.route('/recommend/batch', methods=['POST'])
+def recommend_batch():
+    data = request.json
+    candidate_ids = data.get('candidate_ids')
+    top_k = data.get('top_k', 5)
+    filters = data.get('filters')
+    
+    if not candidate_ids or not isinstance(candidate_ids, list):
+        return jsonify({"error": "candidate_ids must be a non-empty list"}), 400
+    
+    error = validate_filters(filters)
+    if error:
+        return jsonify({"error": error}), 400
+    
+    # One JSON object per candidate, streamed as each batch is ranked
+    results = recommender.recommend_jobs_batch([str(c) for c in candidate_ids], top_k, filters=filters)
+    lines = (app.json.dumps(result) + '\n' for result in results)
+    return Response(stream_with_context(lines), mimetype='application/x-ndjson')
+
 if __name__ == '__main__':
+    # Under gunicorn, post_fork starts the refresher in each worker instead
+    recommender.start_background_refresh()
     app.run(host='0.0.0.0', port=5001)
\ No newline at end of file
@@ -0,0 +1,129 @@
+import os
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Tuple
+
+# Alternative spellings folded onto the canonical names used in skills_list.txt
+SKILL_ALIASES = {
+    "js": "javascript",
+    "es6": "javascript",
+    "ts": "typescript",
+    "py": "python",
+    "python3": "python",
+    "reactjs": "react",
+    "react.js": "react",
+    "node": "nodejs",
+    "node.js": "nodejs",
+    "angularjs": "angular",
+    "spring boot": "spring",
+    "postgres": "postgresql",
+    "mongo": "mongodb",
+    "golang": "go",
+    "k8s": "kubernetes",
+    "amazon web services": "aws",
+    "google cloud": "gcp",
+    "microsoft azure": "azure",
+    "power bi": "powerbi",
+    "tailwind": "tailwind css",
+    "tailwindcss": "tailwind css",
+    "photoshop": "adobe photoshop",
+    "illustrator": "adobe illustrator",
+    "sklearn": "scikit-learn",
+    "ml": "machine learning",
+    "dl": "deep learning",
+    "c plus plus": "c++",
+    "cpp": "c++",
+}
+
+# Distinct skill lists whose skill sets are kept (one job or candidate each)
+SKILL_SET_CACHE_SIZE = 65536
+
+SKILLS_LIST_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "skills_list.txt")
+
+
+def normalize_skill(skill) -> str:
+    """Lowercase and collapse whitespace"""
+    return ' '.join(str(skill).lower().split())
+
+
+def load_skill_list(path: str = SKILLS_LIST_PATH) -> List[str]:
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+class SkillSet(NamedTuple):
+    """Canonical skills of one list: known skills as bits, others as strings"""
+    bits: int
+    other: FrozenSet[str]
+
+    def __len__(self) -> int:
+        return self.bits.bit_count() + len(self.other)
+
+    def __and__(self, other: "SkillSet") -> "SkillSet":
+        return SkillSet(self.bits & other.bits, self.other & other.other)
+
+
+class SkillVocabulary:
+    """Fixed vocabulary of known skills with small integer ids.
+
+    Ids are assigned once, to the canonical names of skills_list.txt and of
+    the alias targets, so a bitset is never wider than the vocabulary. Free
+    text skills outside it are compared as exact canonical strings instead
+    of being interned, which keeps memory bounded whatever requests send.
+    Skill sets are cached per distinct list, so a job's skills are
+    normalized once however many candidates it is scored against.
+    """
+
+    def __init__(self, known_skills: Iterable[str] = (), aliases: Dict[str, str] = SKILL_ALIASES):
+        self.aliases = {normalize_skill(alias): normalize_skill(name) for alias, name in aliases.items()}
+        self._names: List[str] = []
+        self._ids: Dict[str, int] = {}
+        for skill in [*known_skills, *self.aliases.values()]:
+            name = self.canonical(skill)
+            if name and name not in self._ids:
+                self._ids[name] = len(self._names)
+                self._names.append(name)
+        self._skill_set = lru_cache(maxsize=SKILL_SET_CACHE_SIZE)(self._compute_skill_set)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def canonical(self, skill) -> str:
+        skill = normalize_skill(skill)
+        return self.aliases.get(skill, skill)
+
+    def skill_id(self, skill) -> Optional[int]:
+        """Id of the canonical form of skill, or None if it is not in the vocabulary"""
+        return self._ids.get(self.canonical(skill))
+
+    def name(self, skill_id: int) -> str:
+        return self._names[skill_id]
+
+    def _compute_skill_set(self, skills: Tuple[str, ...]) -> SkillSet:
+        bits = 0
+        other = set()
+        for skill in skills:
+            name = self.canonical(skill)
+            if not name:
+                continue
+            skill_id = self._ids.get(name)
+            if skill_id is None:
+                other.add(name)
+            else:
+                bits |= 1 << skill_id
+        return SkillSet(bits, frozenset(other))
+
+    def skill_set(self, skills: Iterable[str]) -> SkillSet:
+        """Cached canonical skill set of skills"""
+        return self._skill_set(tuple(skills))
+
+    def names(self, skills: SkillSet) -> List[str]:
+        """Canonical skill names in skills: known ones in id order, then the others sorted"""
+        bits = skills.bits
+        known = [self._names[i] for i in range(bits.bit_length()) if bits >> i & 1]
+        return known + sorted(skills.other)
+
+
+# Process-wide vocabulary shared by the hiring model and the resume parser
+vocabulary = SkillVocabulary(load_skill_list())
@@ -0,0 +1,88 @@
+import os
+import sys
+import pytest
+
+pytest.importorskip("flask")
+pytest.importorskip("pandas")
+mongomock = pytest.importorskip("mongomock")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import clustering  # noqa: E402
+
+SUMMARY = {"updated": 0, "removed": 0}
+
+
+@pytest.fixture
+def db(monkeypatch):
+    import data_access
+    monkeypatch.setattr(data_access, "_client", None)
+    monkeypatch.setattr(clustering, "_indexes_ready", False)
+    data_access.use_client(mongomock.MongoClient())
+    return clustering.get_db()
+
+
+@pytest.fixture
+def client(db, monkeypatch):
+    # No background thread in tests: syncs only run when a test calls them
+    monkeypatch.setattr(clustering, "start_background_sync", lambda: None)
+    return clustering.app.test_client()
+
+
+def test_lease_is_held_by_one_process_until_released_or_expired(db, monkeypatch):
+    assert clustering.acquire_sync_lease(db)
+    assert clustering.acquire_sync_lease(db)  # renewal by the holder
+
+    monkeypatch.setattr(clustering, "lease_owner", lambda: "other-host:1")
+    assert not clustering.acquire_sync_lease(db)
+
+    db[clustering.SYNC_COLLECTION].update_one(
+        {"_id": clustering.SYNC_LEASE_ID}, {"$set": {"expires_at": clustering.datetime(2000, 1, 1)}}
+    )
+    assert clustering.acquire_sync_lease(db)  # expired: taken over
+
+
+def test_sync_skipped_while_another_process_holds_the_lease(db, monkeypatch):
+    calls = []
+    monkeypatch.setattr(clustering, "sync_cluster_assignments", lambda: calls.append(1) or SUMMARY)
+    owner = clustering.lease_owner
+    monkeypatch.setattr(clustering, "lease_owner", lambda: "other-host:1")
+    assert clustering.acquire_sync_lease(db)
+    monkeypatch.setattr(clustering, "lease_owner", owner)
+
+    assert clustering.refresh_assignments(wait=True) is None
+    assert calls == []
+    assert not clustering.view_synced(db)
+
+
+def test_fresh_view_is_not_synced_again(db, monkeypatch):
+    calls = []
+    monkeypatch.setattr(clustering, "sync_cluster_assignments", lambda: calls.append(1) or SUMMARY)
+
+    assert clustering.refresh_assignments(wait=False, max_age=60) == SUMMARY
+    assert clustering.view_synced(db, max_age=60)
+    # Another worker's refresher finds the shared view fresh
+    assert clustering.refresh_assignments(wait=False, max_age=60) is None
+    assert calls == [1]
+
+
+def test_cluster_does_not_sync_inside_the_request(client, db, monkeypatch):
+    def fail():
+        raise AssertionError("synced inside the request")
+    monkeypatch.setattr(clustering, "sync_cluster_assignments", fail)
+
+    response = client.get("/cluster")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == str(clustering.CLUSTER_SYNC_SECONDS)
+
+    # Synced, but no candidates: the view exists and is empty
+    monkeypatch.setattr(clustering, "sync_cluster_assignments", lambda: SUMMARY)
+    assert client.post("/cluster/sync").status_code == 200
+    assert client.get("/cluster").status_code == 404
+
+
+def test_manual_sync_conflicts_with_a_running_one(client, db, monkeypatch):
+    owner = clustering.lease_owner
+    monkeypatch.setattr(clustering, "lease_owner", lambda: "other-host:1")
+    assert clustering.acquire_sync_lease(db)
+    monkeypatch.setattr(clustering, "lease_owner", owner)
+
+    assert client.post("/cluster/sync").status_code == 409
@@ -0,0 +1,96 @@
+import os
+import sys
+import pytest
+
+np = pytest.importorskip("numpy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from embedding_store import EmbeddingStore  # noqa: E402
+
+DIMENSION = 4
+
+
+def vectors(*values):
+    return np.array([[value] * DIMENSION for value in values], dtype='float32')
+
+
+def test_round_trip_survives_reopen(tmp_path):
+    store = EmbeddingStore(str(tmp_path), "jobs", DIMENSION)
+    store.put_many(["a", "b"], ["ha", "hb"], vectors(1, 2))
+
+    reopened = EmbeddingStore(str(tmp_path), "jobs", DIMENSION)
+    found = reopened.get_many(["a", "b", "c"], ["ha", "hb", "hc"])
+    assert sorted(found) == [0, 1]
+    np.testing.assert_array_equal(found[1], vectors(2)[0])
+
+
+def test_changed_hash_misses_and_put_supersedes(tmp_path):
+    store = EmbeddingStore(str(tmp_path), "jobs", DIMENSION)
+    store.put_many(["a"], ["old"], vectors(1))
+    assert store.get("a", "new") is None
+
+    store.put_many(["a"], ["new"], vectors(5))
+    np.testing.assert_array_equal(store.get("a", "new"), vectors(5)[0])
+    assert store.get("a", "old") is None
+    assert store.dead_rows == 1
+
+    reopened = EmbeddingStore(str(tmp_path), "jobs", DIMENSION)
+    np.testing.assert_array_equal(reopened.get("a", "new"), vectors(5)[0])
+
+
+def test_discard_and_compact(tmp_path):
+    store = EmbeddingStore(str(tmp_path), "jobs", DIMENSION)
+    store.put_many(["a", "b", "c"], ["ha", "hb", "hc"], vectors(1, 2, 3))
+    store.discard(["b"])
+    assert store.get("b", "hb") is None
+    assert len(store) == 2 and store.dead_rows == 1
+
+    store.compact()
+    assert store.dead_rows == 0
+    assert os.path.getsize(store.matrix_path) == 2 * 4 * DIMENSION
+    np.testing.assert_array_equal(store.get("c", "hc"), vectors(3)[0])
+
+    reopened = EmbeddingStore(str(tmp_path), "jobs", DIMENSION)
+    assert len(reopened) == 2
+    np.testing.assert_array_equal(reopened.get("a", "ha"), vectors(1)[0])
+    assert reopened.get("b", "hb") is None
+
+
+def test_torn_trailing_row_is_truncated(tmp_path):
+    store = EmbeddingStore(str(tmp_path), "jobs", DIMENSION)
+    store.put_many(["a"], ["ha"], vectors(1))
+    with open(store.matrix_path, 'ab') as f:
+        f.write(b'\x00' * 6)  # an interrupted append
+    with open(store.ids_path, 'a', encoding='utf-8') as f:
+        f.write("b\thb\t")  # and its torn log line
+
+    reopened = EmbeddingStore(str(tmp_path), "jobs", DIMENSION)
+    assert os.path.getsize(reopened.matrix_path) == 4 * DIMENSION
+    assert reopened.get("b", "hb") is None
+
+    reopened.put_many(["c"], ["hc"], vectors(7))
+    np.testing.assert_array_equal(reopened.get("a", "ha"), vectors(1)[0])
+    np.testing.assert_array_equal(reopened.get("c", "hc"), vectors(7)[0])
+    np.testing.assert_array_equal(
+        EmbeddingStore(str(tmp_path), "jobs", DIMENSION).get("c", "hc"), vectors(7)[0]
+    )
+
+
+def test_stores_sharing_files_see_each_others_writes(tmp_path):
+    # Two workers opening the same store: appends must not reuse rows, and
+    # a compaction by one must not leave the other reading stale rows
+    first = EmbeddingStore(str(tmp_path), "jobs", DIMENSION)
+    second = EmbeddingStore(str(tmp_path), "jobs", DIMENSION)
+    first.put_many(["a", "b"], ["ha", "hb"], vectors(1, 2))
+    second.put_many(["c"], ["hc"], vectors(3))
+    np.testing.assert_array_equal(second.get("a", "ha"), vectors(1)[0])
+    np.testing.assert_array_equal(first.get("c", "hc"), vectors(3)[0])
+
+    first.discard(["a"])
+    first.compact()
+    assert second.get("a", "ha") is None
+    second.put_many(["d"], ["hd"], vectors(4))
+    for store in (first, second, EmbeddingStore(str(tmp_path), "jobs", DIMENSION)):
+        np.testing.assert_array_equal(store.get("b", "hb"), vectors(2)[0])
+        np.testing.assert_array_equal(store.get("c", "hc"), vectors(3)[0])
+        np.testing.assert_array_equal(store.get("d", "hd"), vectors(4)[0])
+        assert len(store) == 3 and store.dead_rows == 0
@@ -0,0 +1,108 @@
+import hashlib
+import importlib
+import os
+import sys
+import types
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("faiss")
+pytest.importorskip("flask")
+pytest.importorskip("prometheus_client")
+mongomock = pytest.importorskip("mongomock")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DIMENSION = 16
+JOBS = 400
+
+
+class StubEncoder:
+    """Deterministic stand-in for the sentence transformer: a random vector per text"""
+
+    def __init__(self, name):
+        pass
+
+    def get_sentence_embedding_dimension(self):
+        return DIMENSION
+
+    def encode(self, texts, convert_to_tensor=False):
+        return np.array([
+            np.random.default_rng(int(hashlib.sha1(text.encode('utf-8')).hexdigest()[:8], 16))
+            .standard_normal(DIMENSION)
+            for text in texts
+        ], dtype='float32')
+
+
+@pytest.fixture(scope="module")
+def job_recommender():
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setitem(sys.modules, "sentence_transformers",
+                      types.SimpleNamespace(SentenceTransformer=StubEncoder))
+        sys.modules.pop("job_recommender", None)
+        module = importlib.import_module("job_recommender")
+    yield module
+    sys.modules.pop("job_recommender", None)
+
+
+@pytest.fixture
+def db(monkeypatch):
+    import data_access
+    monkeypatch.setattr(data_access, "_client", None)
+    data_access.use_client(mongomock.MongoClient())
+    return data_access.get_db()
+
+
+def expected_score(job_recommender, recommender, job, candidate):
+    vectors = job_recommender.JobRecommender._encode([
+        recommender._prepare_job_text(job), recommender._prepare_candidate_text(candidate)
+    ])
+    return float(vectors[0] @ vectors[1])
+
+
+@pytest.mark.parametrize("index_type", ["flat", "ivf_flat", "ivf_pq", "hnsw"])
+def test_refresh_after_edits_and_deletes_returns_right_jobs(job_recommender, db, tmp_path, monkeypatch, index_type):
+    from index_factory import IndexConfig
+
+    monkeypatch.setattr(job_recommender, "EMBEDDING_STORE_DIR", str(tmp_path))
+    db.jobs.insert_many([{"title": f"Job {i}", "description": f"Posting number {i}"} for i in range(JOBS)])
+    db.users.insert_many([
+        {"role": "CANDIDATE", "profile": {"resume": f"Candidate {i}", "skills": [f"skill {i}"]}}
+        for i in range(5)
+    ])
+    # Visiting every cell makes the IVF searches exhaustive; one PQ
+    # sub-quantizer per dimension keeps its scores within a few hundredths
+    tolerance = 5e-2 if index_type == "ivf_pq" else 1e-4
+    config = IndexConfig(index_type=index_type, nlist=4, nprobe=4, pq_m=DIMENSION, pq_bits=8)
+    recommender = job_recommender.JobRecommender(config)
+    recommender.update_job_index(force=True)
+
+    jobs = list(db.jobs.find())
+    edited, deleted = jobs[3], jobs[7]
+    db.jobs.update_one({"_id": edited["_id"]}, {"$set": {"title": "Edited job"}})
+    db.jobs.delete_one({"_id": deleted["_id"]})
+    recommender.update_job_index(force=True)
+    # Still the incremental path: nothing retrained or rebuilt
+    assert recommender._snapshot.trained_size == JOBS
+
+    jobs = {str(job["_id"]): job for job in db.jobs.find()}
+    candidates = list(db.users.find())
+    results = [recommender.recommend_jobs(str(c["_id"]), top_k=50, threshold=-1) for c in candidates]
+    results += list(recommender.recommend_jobs_batch([str(c["_id"]) for c in candidates], top_k=50, threshold=-1))
+
+    for candidate, result in zip(candidates * 2, results):
+        returned = [job["_id"] for job in result["recommendations"]]
+        assert len(returned) == 50
+        assert len(set(returned)) == len(returned)
+        assert str(deleted["_id"]) not in returned
+        for job in result["recommendations"]:
+            assert job["title"] == jobs[job["_id"]]["title"]
+            assert job["match_score"] == pytest.approx(
+                expected_score(job_recommender, recommender, jobs[job["_id"]], candidate), abs=tolerance
+            )
+
+    # The edited job is found through its new vector only
+    query = job_recommender.JobRecommender._encode([recommender._prepare_job_text(jobs[str(edited["_id"])])])
+    scores, ids = recommender._search(recommender._snapshot, query, 2)
+    assert recommender._snapshot.job_ids[int(ids[0][0])] == edited["_id"]
+    assert scores[0][0] == pytest.approx(1, abs=tolerance)
+    assert recommender._snapshot.job_ids[int(ids[0][1])] != edited["_id"]
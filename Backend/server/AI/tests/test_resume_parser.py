@@ -0,0 +1,125 @@
+import io
+import json
+import multiprocessing
+import os
+import sys
+import time
+import zipfile
+import pytest
+
+pytest.importorskip("pdfplumber")
+pytest.importorskip("flask")
+pytest.importorskip("prometheus_client")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import iA4  # noqa: E402
+
+UPLOADS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "uploads")
+
+
+def test_bulk_upload_streams_one_record_per_pdf():
+    with open(os.path.join(UPLOADS, "cv.pdf"), 'rb') as f:
+        pdf = f.read()
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_STORED) as archive:
+        archive.writestr("cv.pdf", pdf)
+        archive.writestr("notes.txt", b"not a resume")
+        archive.writestr("corrupt.pdf", pdf)
+    data = bytearray(buffer.getvalue())
+    corrupt = data.rfind(b"corrupt.pdf", 0, data.find(b"PK\x01\x02")) + len("corrupt.pdf")
+    data[corrupt + 100] ^= 0xFF  # fails the member's CRC check
+
+    response = iA4.app.test_client().post(
+        '/upload/bulk', data={'archive': (io.BytesIO(bytes(data)), 'resumes.zip')},
+        content_type='multipart/form-data'
+    )
+    assert response.status_code == 200
+    records = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    by_file = {record['file']: record for record in records if 'file' in record}
+    assert set(by_file) == {"cv.pdf", "corrupt.pdf"}
+    assert by_file["cv.pdf"]['status'] == 'ok'
+    assert by_file["corrupt.pdf"]['status'] == 'failed'
+    assert records[-1]['summary']['files'] == 2
+
+
+def test_bulk_upload_rejects_non_zip():
+    response = iA4.app.test_client().post(
+        '/upload/bulk', data={'archive': (io.BytesIO(b"not a zip"), 'resumes.zip')},
+        content_type='multipart/form-data'
+    )
+    assert response.status_code == 400
+
+
+def slow_pdf(glyphs):
+    """A one-page PDF whose text layout takes seconds to extract"""
+    ops = ''.join(f"BT /F1 4 Tf {i % 150 * 4} {i // 150 % 200 * 4} Td (x) Tj ET\n" for i in range(glyphs))
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 800] /Contents 4 0 R"
+        " /Resources << /Font << /F1 5 0 R >> >> >>",
+        f"<< /Length {len(ops)} >>\nstream\n{ops}endstream",
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    pdf = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(pdf))
+        pdf += f"{number} 0 obj\n{body}\nendobj\n".encode()
+    xref = len(pdf)
+    pdf += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    pdf += b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    pdf += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return pdf
+
+
+def test_slow_page_is_cut_off_at_the_page_budget(monkeypatch):
+    monkeypatch.setattr(iA4, "PAGE_TIME_BUDGET", 0.5)
+    started = time.monotonic()
+    assert iA4.extract_text_from_pdf(io.BytesIO(slow_pdf(30000))) == ''
+    assert time.monotonic() - started < 2  # extracting the page takes about 4s
+    assert not multiprocessing.active_children()
+
+
+def test_header_keywords_only_match_whole_header_lines():
+    sections = iA4.segment_resume("\n".join([
+        "Summary",
+        "Experienced developer working in information technology",
+        "Education:",
+        "MSc Information Systems",
+        "University of Tunis",
+        "Work Experience",
+        "ACME - Developer - 2020",
+    ]))
+    assert sections['summary'] == ["Experienced developer working in information technology"]
+    assert sections['education'] == ["MSc Information Systems", "University of Tunis"]
+    assert sections['experience'] == ["ACME - Developer - 2020"]
+
+
+def test_repeated_section_is_continued():
+    sections = iA4.segment_resume("\n".join([
+        "Experience", "ACME - Developer - 2020", "Skills", "Python", "EXPERIENCE", "Globex - Intern - 2019",
+    ]))
+    assert sections['experience'] == ["ACME - Developer - 2020", "Globex - Intern - 2019"]
+    assert sections['skills'] == ["Python"]
+
+
+def test_side_by_side_headers_start_both_sections():
+    sections = iA4.segment_resume("\n".join(["Profile Education", "Web developer (2010-2014)", "Skills", "Java"]))
+    assert sections['summary'] == sections['education'] == ["Web developer (2010-2014)"]
+
+
+def sample_education(filename):
+    return iA4.segment_resume(iA4.extract_text_from_pdf(os.path.join(UPLOADS, filename)))['education']
+
+
+def test_summary_mentioning_information_technology_keeps_education():
+    education = sample_education("resume-1744223301469.pdf")
+    assert len(education) == 7  # as the previous per-section extractor read it
+    assert education[0].startswith("PrivateHigherSchoolofEngineeringandTechnologiesESPRIT")
+
+
+def test_two_column_header_line_keeps_education():
+    # "Profile Education" heads both columns of the first block
+    education = sample_education("resume-1744331583434.pdf")
+    assert "INGOUDE UNIVERSITY" in education
+    assert "Bachelor of Computer Science and Networks" in education
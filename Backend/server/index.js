@@ -1568,6 +1568,31 @@ app.post('/predict-from-skills', async (req, res) => {
   }
 });
 
+app.post('/predict-from-skills/batch', async (req, res) => {
+  try {
+    // Same experience normalisation as the single-pair route, applied per pair
+    const pairs = (req.body.pairs || []).map(pair => ({
+      ...pair,
+      candidate_exp: Array.isArray(pair.candidate_exp) 
+        ? pair.candidate_exp[0] || 0 
+        : pair.candidate_exp || 0,
+      required_exp: Array.isArray(pair.required_exp) 
+        ? pair.required_exp[0] || 1 
+        : pair.required_exp || 1
+    }));
+
+    const response = await axios.post('http://localhost:5000/predict-from-skills/batch', { pairs });
+    res.json(response.data);
+  } catch (error) {
+    console.error('Error calling Flask service:', error.response?.data || error.message);
+    res.status(error.response?.status || 500).json({ 
+      error: 'Failed to get predictions',
+      details: error.response?.data || error.message,
+      status: 'failed' 
+    });
+  }
+});
+
 const recommendationRoutes = require('./routes/recommendationRoute');
 app.use('/api/recommendations', recommendationRoutes);
 // Start the server